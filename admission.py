@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when a conversion cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits concurrent conversions and bounds the queue of waiting requests.
+
+    Up to `max_concurrency` holders run at once and up to `max_queue` more
+    wait; beyond that requests are rejected immediately with a retry hint
+    derived from the observed conversion throughput.
+
+    Each request states a relative `cost` (see probe.DeckProfile), and the
+    controller learns the seconds per cost unit from completed conversions.
+    Waiters are served in order of arrival time plus predicted duration:
+    among requests that arrive together the shortest runs first, and a long
+    one is overtaken by at most its own predicted duration of later arrivals,
+    so it cannot starve.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: Optional[float] = None,
+        initial_duration: float = 5.0,
+    ):
+        if max_concurrency < 1 or max_queue < 0:
+            raise ValueError("max_concurrency must be >= 1 and max_queue >= 0")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        # Heap of (priority, sequence, predicted seconds, future)
+        self._waiters: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Exponentially weighted moving averages of slot hold time, overall and per cost unit
+        self._avg_duration = initial_duration
+        self._avg_unit_duration = initial_duration
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, w in self._waiters if not w.done())
+
+    def predict(self, cost: float = 1.0) -> float:
+        """Expected conversion time in seconds for a request of `cost`."""
+        return cost * self._avg_unit_duration
+
+    def retry_after(self, cost: float = 1.0) -> int:
+        """Seconds until the current backlog is expected to drain one slot's worth."""
+        backlog = sum(predicted for _, _, predicted, w in self._waiters if not w.done()) + self.predict(cost)
+        return max(1, math.ceil(backlog / self.max_concurrency))
+
+    async def _acquire(self, cost: float) -> float:
+        if self._active < self.max_concurrency and not self.queued:
+            self._active += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            self._rejected += 1
+            raise QueueFullError("Conversion queue is full", self.retry_after(cost))
+
+        waiter = asyncio.get_running_loop().create_future()
+        started = time.monotonic()
+        predicted = self.predict(cost)
+        entry = (started + predicted, next(self._sequence), predicted, waiter)
+        heapq.heappush(self._waiters, entry)
+        try:
+            if self.queue_timeout is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise QueueFullError("Timed out waiting for a conversion slot", self.retry_after(cost))
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self._release()
+            raise
+        finally:
+            try:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            except ValueError:
+                pass
+        return time.monotonic() - started
+
+    def _release(self) -> None:
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; _active is unchanged
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1.0) -> AsyncIterator[float]:
+        """Hold a conversion slot; yields the time spent waiting for it."""
+        waited = await self._acquire(cost)
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            duration = time.monotonic() - started
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            if cost > 0:
+                self._avg_unit_duration = 0.8 * self._avg_unit_duration + 0.2 * duration / cost
+            self._completed += 1
+            self._release()
+
+    def status(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "completed": self._completed,
+            "avg_wait_seconds": round(self._total_wait / self._admitted, 3) if self._admitted else 0.0,
+            "max_wait_seconds": round(self._max_wait, 3),
+            "avg_conversion_seconds": round(self._avg_duration, 3),
+            "avg_seconds_per_cost_unit": round(self._avg_unit_duration, 3),
+            "retry_after_seconds": self.retry_after(),
+        }
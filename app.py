@@ -3,19 +3,352 @@ import shutil
 import uuid
 import os
 import asyncio
+import hashlib
+import importlib.util
+import json
 import logging
-from typing import Optional, Dict
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, BinaryIO, Optional, Dict, Tuple
 
 import httpx
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Header, Request
-from fastapi.responses import FileResponse, JSONResponse, Response
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends, Header, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
-from libreoffice import convert_pptx_to_pdf, resolve_libreoffice_path
+from admission import AdmissionController, QueueFullError
+import metrics
+from batching import BatchConverter
+from cache import DiskCache
+from jobs import FAILED, Job, JobManager, JobQueueFullError, JobRetryError
+from workqueue import MemoryWorkQueue, RedisWorkQueue, SQLiteWorkQueue, WorkQueue
+from media import pillow_available, preprocess_media
+from libreoffice import EXPORT_PROFILES, ConversionOptions, ConversionTimeoutError, convert_pptx_to_pdf, resolve_libreoffice_path
+from pool import OfficePool, PoolExhaustedError, uno_available
+from probe import DeckProfile, probe_deck
+from shard import extract_slides, merge_pdfs, pypdf_available, split_deck
+from profiles import ProfileSlots, ProfileTemplate
+from reaper import SofficeReaper
+from singleflight import SingleFlight
 
 SHOW_DOCS = os.getenv("SHOW_DOCS", "false").lower() == "true"
 
+# Persistent LibreOffice worker pool: auto (use when pyuno is importable), true, false
+LIBREOFFICE_POOL = os.getenv("LIBREOFFICE_POOL", "auto").lower()
+POOL_MIN_SIZE = int(os.getenv("POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("POOL_MAX_SIZE", "4"))
+POOL_IDLE_TIMEOUT = float(os.getenv("POOL_IDLE_TIMEOUT", "300"))
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("POOL_ACQUIRE_TIMEOUT", "120"))
+# Recycling policies for pooled instances; 0 disables each
+POOL_MAX_CONVERSIONS = int(os.getenv("POOL_MAX_CONVERSIONS", "200"))
+POOL_MAX_RSS_MB = int(os.getenv("POOL_MAX_RSS_MB", "1024"))
+POOL_MAX_AGE = float(os.getenv("POOL_MAX_AGE", "3600"))
+POOL_CHECK_INTERVAL = float(os.getenv("POOL_CHECK_INTERVAL", "30"))
+
+# Per-process LibreOffice user profiles, cloned from a template built at startup
+PROFILE_SLOTS = int(os.getenv("PROFILE_SLOTS", str(os.cpu_count() or 2)))
+PROFILE_CLONE_MODE = os.getenv("PROFILE_CLONE_MODE", "reflink").lower()
+
+# Micro-batching of CLI conversions (pool disabled only); 0 turns it off
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+
+# Admission control: concurrent conversions, waiting requests, and the reply when full
+CONVERT_CONCURRENCY = int(os.getenv("CONVERT_CONCURRENCY", str(os.cpu_count() or 2)))
+CONVERT_QUEUE_SIZE = int(os.getenv("CONVERT_QUEUE_SIZE", "32"))
+CONVERT_QUEUE_TIMEOUT = float(os.getenv("CONVERT_QUEUE_TIMEOUT", "0")) or None
+QUEUE_FULL_STATUS = int(os.getenv("QUEUE_FULL_STATUS", "503"))
+# Separate lane for large or complex decks so they cannot block small ones; 0 disables it
+HEAVY_LANE_CONCURRENCY = int(os.getenv("HEAVY_LANE_CONCURRENCY", "0"))
+HEAVY_LANE_QUEUE_SIZE = int(os.getenv("HEAVY_LANE_QUEUE_SIZE", str(CONVERT_QUEUE_SIZE)))
+HEAVY_LANE_MIN_MB = float(os.getenv("HEAVY_LANE_MIN_MB", "20"))
+HEAVY_LANE_MIN_COST = float(os.getenv("HEAVY_LANE_MIN_COST", "10"))
+
+# Default PDF export profile (draft, standard, archival); empty (default) for LibreOffice's own settings
+PDF_EXPORT_PROFILE = os.getenv("PDF_EXPORT_PROFILE", "").lower() or None
+# Convert only the pages a parse request asks for; opt-in because older LibreOffice
+# ignores the page range and the rebased page ids would then point at the wrong pages
+PARSER_PAGE_WINDOW = os.getenv("PARSER_PAGE_WINDOW", "false").lower() == "true"
+
+# Strip audio/video and downsample huge images before converting media-heavy decks
+MEDIA_PREPROCESS = os.getenv("MEDIA_PREPROCESS", "false").lower() == "true"
+MEDIA_PREPROCESS_MIN_MB = float(os.getenv("MEDIA_PREPROCESS_MIN_MB", "5"))
+MEDIA_MAX_IMAGE_PX = int(os.getenv("MEDIA_MAX_IMAGE_PX", "2560"))
+
+# Split decks of at least SHARD_MIN_SLIDES into chunks converted in parallel (needs pypdf); 0 disables it
+SHARD_MIN_SLIDES = int(os.getenv("SHARD_MIN_SLIDES", "0"))
+SHARD_MAX_CHUNKS = int(os.getenv("SHARD_MAX_CHUNKS", str(os.cpu_count() or 2)))
+SHARD_MIN_CHUNK_SLIDES = int(os.getenv("SHARD_MIN_CHUNK_SLIDES", "25"))
+
+# Per-conversion timeout: base seconds plus seconds per MB of input, capped
+CONVERT_TIMEOUT = float(os.getenv("CONVERT_TIMEOUT", "120"))
+CONVERT_TIMEOUT_PER_MB = float(os.getenv("CONVERT_TIMEOUT_PER_MB", "2"))
+CONVERT_TIMEOUT_PER_SLIDE = float(os.getenv("CONVERT_TIMEOUT_PER_SLIDE", "1"))
+CONVERT_TIMEOUT_MAX = float(os.getenv("CONVERT_TIMEOUT_MAX", "900"))
+# Seconds between scans for orphaned soffice processes; 0 disables the reaper
+REAPER_INTERVAL = float(os.getenv("REAPER_INTERVAL", "30"))
+
+# Converted PDFs keyed by upload content; 0 bytes disables the cache
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+# Successful parser responses keyed by deck, conversion options, parser URL and parameters; 0 bytes disables it
+PARSER_CACHE_MAX_BYTES = int(os.getenv("PARSER_CACHE_MAX_BYTES", "0"))
+PARSER_CACHE_MAX_ENTRIES = int(os.getenv("PARSER_CACHE_MAX_ENTRIES", "10000"))
+PARSER_CACHE_TTL = float(os.getenv("PARSER_CACHE_TTL", "86400"))
+# Bump when conversion output changes so stale cached PDFs are not served
+CONVERSION_CACHE_VERSION = 1
+
+# Asynchronous job API
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(CONVERT_CONCURRENCY)))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "60"))
+# Work queue backend for jobs: memory, sqlite (data/jobs.db, shared by the workers on a host) or redis
+JOB_QUEUE = os.getenv("JOB_QUEUE", "sqlite").lower()
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "redis://localhost:6379/0")
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Slides converted ahead of the rest and served from /jobs/{id}/preview; 0 disables previews by default
+JOB_PREVIEW_SLIDES = int(os.getenv("JOB_PREVIEW_SLIDES", "0"))
+
+# One pooled HTTP client per process for parser calls; HTTP/2 needs the h2 package
+PARSER_TIMEOUT = float(os.getenv("PARSER_TIMEOUT", "300"))
+PARSER_CONNECT_TIMEOUT = float(os.getenv("PARSER_CONNECT_TIMEOUT", "20"))
+PARSER_MAX_CONNECTIONS = int(os.getenv("PARSER_MAX_CONNECTIONS", "100"))
+PARSER_MAX_KEEPALIVE = int(os.getenv("PARSER_MAX_KEEPALIVE", "20"))
+PARSER_KEEPALIVE_EXPIRY = float(os.getenv("PARSER_KEEPALIVE_EXPIRY", "60"))
+PARSER_HTTP2 = os.getenv("PARSER_HTTP2", "false").lower() == "true"
+
+# Stream parser responses to the client as received instead of decoding and re-encoding the JSON
+PARSER_PASSTHROUGH = os.getenv("PARSER_PASSTHROUGH", "true").lower() == "true"
+# Upload field names parsers are tried with, and how long the accepted one is remembered per URL
+PARSER_FIELD_NAMES = ("files", "file")
+PARSER_FIELD_CACHE_TTL = float(os.getenv("PARSER_FIELD_CACHE_TTL", "3600"))
+# Parser URLs are client-supplied; remember at most this many
+PARSER_FIELD_CACHE_SIZE = int(os.getenv("PARSER_FIELD_CACHE_SIZE", "1024"))
+# Statuses meaning "wrong field name"; other errors, including a bare 400 that may be any
+# invalid request, are returned without a second upload
+PARSER_FIELD_MISMATCH_STATUSES = {415, 422}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+office_pool: Optional[OfficePool] = None
+profile_slots: Optional[ProfileSlots] = None
+batch_converter: Optional[BatchConverter] = None
+admission = AdmissionController(CONVERT_CONCURRENCY, CONVERT_QUEUE_SIZE, queue_timeout=CONVERT_QUEUE_TIMEOUT)
+heavy_admission = (
+    AdmissionController(HEAVY_LANE_CONCURRENCY, HEAVY_LANE_QUEUE_SIZE, queue_timeout=CONVERT_QUEUE_TIMEOUT)
+    if HEAVY_LANE_CONCURRENCY > 0
+    else None
+)
+# Conversions block a thread for their whole duration; keep them off the
+# default executor so file I/O and sync endpoints are never starved.
+conversion_executor: Optional[ThreadPoolExecutor] = None
+heavy_executor: Optional[ThreadPoolExecutor] = None
+shard_executor: Optional[ThreadPoolExecutor] = None
+soffice_reaper: Optional[SofficeReaper] = None
+result_cache: Optional[DiskCache] = None
+parser_cache: Optional[DiskCache] = None
+conversion_flights: Optional[SingleFlight] = None
+job_manager: Optional[JobManager] = None
+parser_client: Optional[httpx.AsyncClient] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global office_pool, profile_slots, batch_converter, conversion_executor, soffice_reaper, result_cache
+    global conversion_flights, job_manager, heavy_executor, shard_executor, parser_client, parser_cache
+    loop = asyncio.get_running_loop()
+    # Fail fast on a misspelled PDF_EXPORT_PROFILE
+    ConversionOptions(profile=PDF_EXPORT_PROFILE)
+    if MEDIA_PREPROCESS and not pillow_available():
+        logger.warning("MEDIA_PREPROCESS is on but Pillow is not installed; images will not be downsampled")
+    if RESULT_CACHE_MAX_BYTES > 0:
+        result_cache = DiskCache(
+            DATA_DIR / "cache" / "pdf",
+            "result",
+            max_bytes=RESULT_CACHE_MAX_BYTES,
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+            suffix=".pdf",
+        )
+    if PARSER_CACHE_MAX_BYTES > 0:
+        parser_cache = DiskCache(
+            DATA_DIR / "cache" / "parse",
+            "parser",
+            max_bytes=PARSER_CACHE_MAX_BYTES,
+            max_entries=PARSER_CACHE_MAX_ENTRIES,
+            ttl=PARSER_CACHE_TTL or None,
+        )
+    # Identical concurrent uploads share one conversion; lock files extend this
+    # across uvicorn workers, which then pick the PDF up from the shared cache.
+    conversion_flights = SingleFlight(
+        "conversion",
+        lock_dir=DATA_DIR / "locks" if result_cache is not None else None,
+    )
+    conversion_executor = ThreadPoolExecutor(max_workers=CONVERT_CONCURRENCY, thread_name_prefix="convert")
+    if SHARD_MIN_SLIDES > 0:
+        if pypdf_available():
+            shard_executor = ThreadPoolExecutor(max_workers=SHARD_MAX_CHUNKS, thread_name_prefix="convert-shard")
+        else:
+            logger.warning("SHARD_MIN_SLIDES is set but pypdf is not installed; decks will not be split")
+    # Profile clones are named by PID, which only identifies a process on its
+    # own host; keep each host's clones apart in case DATA_DIR is shared
+    template = ProfileTemplate(DATA_DIR / "profiles" / socket.gethostname(), clone_mode=PROFILE_CLONE_MODE)
+    if REAPER_INTERVAL > 0 and SofficeReaper.supported():
+        # Kill leftovers of crashed predecessors before their profiles are swept
+        soffice_reaper = SofficeReaper(template.root, interval=REAPER_INTERVAL)
+        await loop.run_in_executor(None, soffice_reaper.sweep)
+        soffice_reaper.start()
+    template.sweep_stale()
+    try:
+        await loop.run_in_executor(None, template.build)
+    except Exception as exc:
+        # Keep serving; slots then start from empty profiles
+        logger.warning("Could not build LibreOffice profile template: %s", exc)
+
+    if LIBREOFFICE_POOL == "true" or (LIBREOFFICE_POOL == "auto" and uno_available()):
+        if not uno_available():
+            raise RuntimeError("LIBREOFFICE_POOL=true requires the LibreOffice Python bindings (pyuno)")
+        pool = OfficePool(
+            template,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            idle_timeout=POOL_IDLE_TIMEOUT,
+            acquire_timeout=POOL_ACQUIRE_TIMEOUT,
+            max_conversions=POOL_MAX_CONVERSIONS,
+            max_rss_bytes=POOL_MAX_RSS_MB * 1024 * 1024,
+            max_age=POOL_MAX_AGE,
+            check_interval=POOL_CHECK_INTERVAL,
+        )
+        await loop.run_in_executor(None, pool.start)
+        office_pool = pool
+        logger.info("LibreOffice pool started (min=%s, max=%s)", POOL_MIN_SIZE, POOL_MAX_SIZE)
+    else:
+        slots = ProfileSlots(template, PROFILE_SLOTS)
+        await loop.run_in_executor(None, slots.prepare)
+        profile_slots = slots
+        logger.info("LibreOffice pool disabled; converting with one soffice process per request (%s profile slots)", PROFILE_SLOTS)
+        if BATCH_WINDOW_MS > 0:
+            batcher = BatchConverter(OUTPUT_DIR, slots, window=BATCH_WINDOW_MS / 1000.0, max_size=BATCH_MAX_SIZE)
+            batcher.start()
+            batch_converter = batcher
+            logger.info("Batching conversions (window=%sms, max=%s)", BATCH_WINDOW_MS, BATCH_MAX_SIZE)
+    _cap_lane_concurrency(
+        POOL_MAX_SIZE if office_pool is not None else PROFILE_SLOTS,
+        batch_size=BATCH_MAX_SIZE if batch_converter is not None else 1,
+    )
+    if heavy_admission is not None:
+        heavy_executor = ThreadPoolExecutor(max_workers=HEAVY_LANE_CONCURRENCY, thread_name_prefix="convert-heavy")
+    parser_client = _create_parser_client()
+    job_manager = JobManager(
+        _run_job,
+        _create_work_queue(),
+        workers=JOB_WORKERS,
+        max_queue=JOB_QUEUE_SIZE,
+        ttl=JOB_TTL,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        lease_timeout=JOB_LEASE_TIMEOUT,
+    )
+    await job_manager.start()
+    try:
+        yield
+    finally:
+        await job_manager.stop()
+        await job_manager.queue.close()
+        client, parser_client = parser_client, None
+        await client.aclose()
+        if office_pool is not None:
+            pool, office_pool = office_pool, None
+            pool.shutdown()
+        if batch_converter is not None:
+            batcher, batch_converter = batch_converter, None
+            batcher.shutdown()
+        if profile_slots is not None:
+            slots, profile_slots = profile_slots, None
+            slots.cleanup()
+        executor, conversion_executor = conversion_executor, None
+        executor.shutdown(wait=False)
+        if heavy_executor is not None:
+            executor, heavy_executor = heavy_executor, None
+            executor.shutdown(wait=False)
+        if shard_executor is not None:
+            executor, shard_executor = shard_executor, None
+            executor.shutdown(wait=False)
+        if soffice_reaper is not None:
+            reaper, soffice_reaper = soffice_reaper, None
+            reaper.stop()
+
+
+def _cap_lane_concurrency(capacity: int, batch_size: int = 1) -> None:
+    """
+    Admit no more conversions than the LibreOffice instances can take, so
+    excess requests wait in admission order. With micro-batching, each fast
+    lane instance takes up to `batch_size` decks per run; heavy decks are
+    never batched. A single instance cannot be split between two lanes, so
+    the heavy lane is turned off and every deck goes through the fast lane.
+    """
+    global heavy_admission
+    capacity = max(1, capacity)
+    if heavy_admission is not None and capacity < 2:
+        logger.warning(
+            "The heavy lane needs at least two LibreOffice instances, one per lane; "
+            "converting every deck in the fast lane"
+        )
+        heavy_admission = None
+    limits = []
+    if heavy_admission is not None:
+        # Leave the fast lane at least one instance of its own
+        limits.append(("heavy", heavy_admission, capacity - 1))
+        capacity -= min(heavy_admission.max_concurrency, capacity - 1)
+    limits.append(("fast", admission, capacity * batch_size))
+    for lane, controller, limit in limits:
+        if controller.max_concurrency > limit:
+            logger.warning(
+                "Lowering %s lane concurrency from %s to %s to match the LibreOffice instances available",
+                lane, controller.max_concurrency, limit,
+            )
+            controller.max_concurrency = limit
+    if batch_size > 1 and admission.max_concurrency <= capacity:
+        logger.warning(
+            "Micro-batching has no effect: %s fast lane conversions are admitted for %s profile slots; "
+            "raise CONVERT_CONCURRENCY (up to %s) so batches can hold more than one deck",
+            admission.max_concurrency, capacity, capacity * batch_size,
+        )
+
+
+def _create_parser_client() -> httpx.AsyncClient:
+    http2 = PARSER_HTTP2
+    if http2:
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("PARSER_HTTP2 is on but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(PARSER_TIMEOUT, connect=PARSER_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=PARSER_MAX_CONNECTIONS,
+            max_keepalive_connections=PARSER_MAX_KEEPALIVE,
+            keepalive_expiry=PARSER_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+
+
+def _create_work_queue() -> WorkQueue:
+    owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    if JOB_QUEUE == "memory":
+        return MemoryWorkQueue(owner)
+    if JOB_QUEUE == "sqlite":
+        return SQLiteWorkQueue(DATA_DIR / "jobs.db", owner)
+    if JOB_QUEUE == "redis":
+        return RedisWorkQueue(JOB_QUEUE_URL, owner)
+    raise RuntimeError(f"Unknown JOB_QUEUE {JOB_QUEUE!r}; expected memory, sqlite or redis")
+
+
 if SHOW_DOCS:
-    app = FastAPI(title="pptx2pdf", version="1.0.0")
+    app = FastAPI(title="pptx2pdf", version="1.0.0", lifespan=lifespan)
 else:
     # 彻底禁用 Swagger, ReDoc 和 OpenAPI JSON 结构
     app = FastAPI(
@@ -23,15 +356,17 @@ else:
         version="1.0.0",
         docs_url=None, 
         redoc_url=None, 
-        openapi_url=None
+        openapi_url=None,
+        lifespan=lifespan,
     )
 
 BASE_DIR = Path(__file__).parent.resolve()
 DATA_DIR = BASE_DIR / "data"
 UPLOAD_DIR = DATA_DIR / "uploads"
 OUTPUT_DIR = DATA_DIR / "outputs"
+JOBS_DIR = DATA_DIR / "jobs"
 
-for d in (UPLOAD_DIR, OUTPUT_DIR):
+for d in (UPLOAD_DIR, OUTPUT_DIR, JOBS_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
 
@@ -55,10 +390,299 @@ def _cleanup_paths(*paths: Path) -> None:
             pass
 
 
-def _build_multipart_file(field_name: str, filename: str, content: bytes, content_type: str = "application/pdf"):
-    """Create a multipart/form-data body containing a single file field.
+def _conversion_timeout(deck: DeckProfile) -> float:
+    size_mb = deck.size_bytes / (1024 * 1024)
+    timeout = CONVERT_TIMEOUT + CONVERT_TIMEOUT_PER_MB * size_mb + CONVERT_TIMEOUT_PER_SLIDE * (deck.slides or 0)
+    return min(timeout, CONVERT_TIMEOUT_MAX)
+
+
+def _lane(deck: DeckProfile) -> str:
+    """Route large or complex decks to the heavy lane when it is enabled."""
+    if heavy_admission is None:
+        return "fast"
+    if deck.size_bytes >= HEAVY_LANE_MIN_MB * 1024 * 1024 or deck.cost() >= HEAVY_LANE_MIN_COST:
+        return "heavy"
+    return "fast"
+
+
+def _prepare_media(input_path: Path, deck: DeckProfile) -> Optional[Path]:
+    """
+    Rewrite a media-heavy .pptx without audio/video and oversized images.
+    Returns the lighter copy (same file name, in its own directory), or None
+    to convert the upload as is.
+    """
+    if not MEDIA_PREPROCESS or deck.slides is None or deck.media_bytes < MEDIA_PREPROCESS_MIN_MB * 1024 * 1024:
+        return None
+    workdir = OUTPUT_DIR / f"prep-{uuid.uuid4().hex}"
+    workdir.mkdir()
+    dest = workdir / input_path.name
+    try:
+        report = preprocess_media(input_path, dest, max_image_px=MEDIA_MAX_IMAGE_PX)
+    except Exception as exc:
+        logger.warning("Media preprocessing of %s failed, converting the original: %s", input_path.name, exc)
+        report = None
+    if report is None or not report.changed:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return None
+    logger.info(
+        "Preprocessed %s: dropped %s media part(s) (%s bytes), downsampled %s image(s) (-%s bytes)",
+        input_path.name, report.dropped_parts, report.dropped_bytes, report.images_downsampled, report.image_bytes_saved,
+    )
+    return dest
+
+
+def _convert_document(input_path: Path, deck: DeckProfile, lane: str, options: ConversionOptions) -> Path:
+    """Convert on an idle pooled LibreOffice instance, or spawn soffice when the pool is off."""
+    prepared = _prepare_media(input_path, deck)
+    try:
+        # The PDF is named after the file stem, which the prepared copy keeps
+        source = prepared or input_path
+        chunks = _shard_count(deck, options)
+        if chunks > 1:
+            return _convert_sharded(source, chunks, options)
+        return _convert_file(source, deck, lane, options)
+    finally:
+        if prepared is not None:
+            shutil.rmtree(prepared.parent, ignore_errors=True)
+
+
+def _shard_count(deck: DeckProfile, options: ConversionOptions) -> int:
+    """Number of chunks to split a deck into; 1 converts it in one piece."""
+    if shard_executor is None or deck.slides is None or deck.slides < SHARD_MIN_SLIDES:
+        return 1
+    # A page range already limits the work to a few slides
+    if options.page_range:
+        return 1
+    return max(1, min(SHARD_MAX_CHUNKS, deck.slides // max(1, SHARD_MIN_CHUNK_SLIDES)))
+
+
+def _convert_sharded(input_path: Path, chunks: int, options: ConversionOptions) -> Path:
+    """Convert slide chunks of a large deck in parallel and merge their PDFs in slide order."""
+    workdir = OUTPUT_DIR / f"shard-{uuid.uuid4().hex}"
+    workdir.mkdir()
+    pdf_paths = []
+    try:
+        parts = split_deck(input_path, workdir, chunks)
+        # Chunks bypass micro-batching, which would put them back into one soffice process
+        futures = [
+            shard_executor.submit(_convert_file, part, probe_deck(part), "heavy", options)
+            for part in parts
+        ]
+        wait(futures)
+        pdf_paths = [f.result() for f in futures if f.exception() is None]
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+        pdf_path = OUTPUT_DIR / f"{input_path.stem}.pdf"
+        merge_pdfs(pdf_paths, pdf_path)
+        metrics.incr("sharded_conversions")
+        logger.info("Converted %s in %s parallel chunks", input_path.name, len(parts))
+        return pdf_path
+    finally:
+        for path in pdf_paths:
+            path.unlink(missing_ok=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _convert_file(input_path: Path, deck: DeckProfile, lane: str, options: ConversionOptions) -> Path:
+    timeout = _conversion_timeout(deck)
+    if office_pool is not None:
+        return office_pool.convert(input_path, OUTPUT_DIR, timeout=timeout, options=options)
+    # A heavy deck would hold up every small deck batched with it
+    if batch_converter is not None and lane == "fast":
+        return batch_converter.convert(input_path, timeout=timeout, options=options)
+    if profile_slots is not None:
+        with profile_slots.slot() as profile_dir:
+            return convert_pptx_to_pdf(input_path, OUTPUT_DIR, profile_dir=profile_dir, timeout=timeout, options=options)
+    return convert_pptx_to_pdf(input_path, OUTPUT_DIR, timeout=timeout, options=options)
+
+
+def _write_upload(src, dest: Path) -> str:
+    digest = hashlib.sha256()
+    with dest.open("wb") as out_f:
+        while True:
+            chunk = src.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out_f.write(chunk)
+    return digest.hexdigest()
+
+
+def _write_body_chunk(out_f, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out_f.write(chunk)
 
-    Returns (body_bytes, content_type_header_value)
+
+async def _write_stream(chunks: AsyncIterator[bytes], dest: Path) -> None:
+    """Write an async byte stream to `dest` without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    try:
+        with dest.open("wb") as out_f:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, out_f.write, chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+
+def _upload_filename(request: Request, file: Optional[UploadFile], filename: Optional[str]) -> str:
+    """Client file name of the deck: the multipart file's, or `filename` for a raw request body."""
+    if file is not None:
+        filename = file.filename
+    elif request.headers.get("content-type", "").lower().startswith(("multipart/", "application/x-www-form-urlencoded")):
+        # A form without a file field; its body has already been parsed
+        filename = None
+    if not filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    return filename
+
+
+async def _save_upload(request: Request, file: Optional[UploadFile], dest: Path) -> str:
+    """
+    Persist an upload without blocking the event loop; returns its SHA-256.
+
+    A multipart file has already been spooled by Starlette and is copied. A
+    raw request body is streamed straight into `dest`, so the deck is
+    written to disk exactly once.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if file is not None:
+            return await loop.run_in_executor(None, _write_upload, file.file, dest)
+        digest = hashlib.sha256()
+        with dest.open("wb") as out_f:
+            async for chunk in request.stream():
+                if chunk:
+                    await loop.run_in_executor(None, _write_body_chunk, out_f, digest, chunk)
+        metrics.incr("uploads_streamed")
+        return digest.hexdigest()
+    except Exception as exc:
+        _cleanup_paths(dest)
+        raise HTTPException(status_code=500, detail=f"Failed to save upload: {exc}")
+
+
+async def _probe_upload(input_path: Path) -> DeckProfile:
+    """Profile a saved upload for scheduling; never fails."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, probe_deck, input_path)
+    except Exception as exc:
+        logger.warning("Could not profile %s: %s", input_path.name, exc)
+        return DeckProfile(size_bytes=0)
+
+
+def _predicted_seconds(deck: DeckProfile) -> float:
+    controller = heavy_admission if _lane(deck) == "heavy" else admission
+    return controller.predict(deck.cost())
+
+
+def _deck_headers(deck: DeckProfile) -> Dict[str, str]:
+    return {"X-Deck-Profile": deck.header(_predicted_seconds(deck)), "X-Conversion-Lane": _lane(deck)}
+
+
+def _conversion_options(page_range: Optional[str] = None, export_profile: Optional[str] = None) -> ConversionOptions:
+    try:
+        return ConversionOptions(page_range=page_range or None, profile=export_profile or PDF_EXPORT_PROFILE)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _conversion_cache_key(content_hash: str, options: ConversionOptions, preview: bool = False) -> str:
+    fields = {"format": "pdf", "version": CONVERSION_CACHE_VERSION, **options.as_dict()}
+    if preview:
+        # Previews are converted from a split-off deck whose cross-slide links
+        # are gone; never hand one out for a page range of the real deck
+        fields["preview"] = True
+    if MEDIA_PREPROCESS:
+        fields["media"] = {"drop_av": True, "max_image_px": MEDIA_MAX_IMAGE_PX}
+    key = hashlib.sha256(content_hash.encode("ascii"))
+    key.update(json.dumps(fields, sort_keys=True).encode("utf-8"))
+    return key.hexdigest()
+
+
+def _store_result(key: str, pdf_path: Path) -> None:
+    try:
+        result_cache.put(key, pdf_path)
+    except Exception as exc:
+        logger.warning("Could not cache %s: %s", pdf_path.name, exc)
+
+
+async def _run_conversion(
+    input_path: Path,
+    content_hash: str,
+    deck: DeckProfile,
+    options: ConversionOptions,
+    preview: bool = False,
+) -> Path:
+    """
+    Convert off the event loop once admitted, serving repeated uploads from
+    the result cache and coalescing identical concurrent ones. Raises
+    HTTPException when the queue is full or the conversion times out.
+    """
+    loop = asyncio.get_running_loop()
+    cache_key = _conversion_cache_key(content_hash, options, preview)
+    dest = OUTPUT_DIR / f"{input_path.stem}.pdf"
+    if result_cache is not None:
+        cached = await loop.run_in_executor(None, result_cache.get_copy, cache_key, dest)
+        if cached is not None:
+            logger.info("Serving cached PDF for %s", input_path.name)
+            return cached
+
+    return await conversion_flights.run(
+        cache_key, dest, lambda: _convert_uncached(input_path, cache_key, deck, options)
+    )
+
+
+async def _convert_uncached(input_path: Path, cache_key: str, deck: DeckProfile, options: ConversionOptions) -> Path:
+    loop = asyncio.get_running_loop()
+    host_lock = conversion_flights.host_lock(cache_key) if result_cache is not None else nullcontext()
+    async with host_lock:
+        if result_cache is not None:
+            # Another uvicorn worker may have converted the same deck while we waited
+            dest = OUTPUT_DIR / f"{input_path.stem}.pdf"
+            cached = await loop.run_in_executor(None, result_cache.get_copy, cache_key, dest)
+            if cached is not None:
+                return cached
+
+        lane = _lane(deck)
+        controller, executor = (heavy_admission, heavy_executor) if lane == "heavy" else (admission, conversion_executor)
+        try:
+            # Cheap decks are admitted ahead of expensive ones
+            async with controller.slot(deck.cost()) as waited:
+                if waited:
+                    logger.debug("Waited %.3fs for a %s lane slot (%s)", waited, lane, input_path.name)
+                pdf_path = await loop.run_in_executor(executor, _convert_document, input_path, deck, lane, options)
+        except QueueFullError as exc:
+            logger.warning("Rejecting conversion: %s (retry after %ss)", exc, exc.retry_after)
+            raise HTTPException(
+                status_code=QUEUE_FULL_STATUS,
+                detail=f"{exc}; retry later",
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+        except PoolExhaustedError as exc:
+            # More conversions were admitted than instances exist (e.g. shards)
+            retry_after = controller.retry_after(deck.cost())
+            logger.warning("Rejecting conversion: %s (retry after %ss)", exc, retry_after)
+            raise HTTPException(
+                status_code=QUEUE_FULL_STATUS,
+                detail=f"{exc}; retry later",
+                headers={"Retry-After": str(retry_after)},
+            )
+        except ConversionTimeoutError as exc:
+            logger.error("Conversion of %s timed out: %s", input_path.name, exc)
+            raise HTTPException(status_code=504, detail=f"Conversion timed out: {exc}")
+
+        if result_cache is not None:
+            await loop.run_in_executor(None, _store_result, cache_key, pdf_path)
+    return pdf_path
+
+
+def _build_multipart_envelope(field_name: str, filename: str, content_type: str = "application/pdf"):
+    """Create the parts of a multipart/form-data body around a single file field.
+
+    Returns (headers_bytes, footer_bytes, content_type_header_value); the file
+    content goes between headers and footer.
     """
     boundary = f"----pptx2pdf-{uuid.uuid4().hex}"
     crlf = "\r\n"
@@ -69,8 +693,19 @@ def _build_multipart_file(field_name: str, filename: str, content: bytes, conten
         f"Content-Type: {content_type}{crlf}{crlf}"
     ).encode("utf-8")
     footer = (f"{crlf}--{boundary}--{crlf}").encode("utf-8")
-    body = headers + content + footer
-    return body, f"multipart/form-data; boundary={boundary}"
+    return headers, footer, f"multipart/form-data; boundary={boundary}"
+
+
+def _iter_multipart_file(headers: bytes, path: Path, footer: bytes):
+    """Yield a multipart body with the file read from disk in chunks."""
+    yield headers
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    yield footer
 
 
 def _effective_parser_url(env_first: bool = True) -> str:
@@ -107,33 +742,64 @@ def healthz():
     })
 
 
+@app.get("/stats")
+def stats():
+    """Runtime status of the conversion machinery."""
+    pool_status = office_pool.status() if office_pool is not None else {"enabled": False}
+    profiles_status = profile_slots.status() if profile_slots is not None else None
+    batching_status = batch_converter.status() if batch_converter is not None else {"enabled": False}
+    return JSONResponse({
+        "pool": pool_status,
+        "profiles": profiles_status,
+        "batching": batching_status,
+        "admission": admission.status(),
+        "heavy_lane": heavy_admission.status() if heavy_admission is not None else {"enabled": False},
+        "result_cache": result_cache.status() if result_cache is not None else {"enabled": False},
+        "parser_cache": parser_cache.status() if parser_cache is not None else {"enabled": False},
+        "singleflight": conversion_flights.status() if conversion_flights is not None else None,
+        "jobs": job_manager.status() if job_manager is not None else None,
+        "reaper": soffice_reaper.status() if soffice_reaper is not None else {"enabled": False},
+        "metrics": metrics.snapshot(),
+    })
+
+
 @app.post("/convert")
-async def convert(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def convert(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: Optional[UploadFile] = File(None),
+    filename: Optional[str] = None,
+    page_range: Optional[str] = None,
+    export_profile: Optional[str] = None,
+):
     """
     Upload a PPT/PPTX and receive the converted PDF.
 
     Returns application/pdf with a filename derived from the uploaded file name.
+    The deck is the multipart field `file`, or the raw request body named by
+    `filename`.
+    `page_range` (e.g. "1-5") renders only those slides; `export_profile`
+    (draft, standard, archival) selects the PDF export settings.
     """
-    if not file or not file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
-
-    ext = _safe_ext(file.filename)
+    filename = _upload_filename(request, file, filename)
+    ext = _safe_ext(filename)
     if ext not in {".ppt", ".pptx"}:
         raise HTTPException(status_code=400, detail="Only .ppt or .pptx files are supported")
+    conversion_options = _conversion_options(page_range, export_profile)
 
     # Store upload with a unique name to avoid collisions
     unique_stem = uuid.uuid4().hex
     input_path = UPLOAD_DIR / f"{unique_stem}{ext}"
 
-    try:
-        with input_path.open("wb") as out_f:
-            shutil.copyfileobj(file.file, out_f)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Failed to save upload: {exc}")
+    content_hash = await _save_upload(request, file, input_path)
+    deck = await _probe_upload(input_path)
 
     # Run conversion; the output PDF will use the unique stem as its base name
     try:
-        pdf_path = convert_pptx_to_pdf(input_path, OUTPUT_DIR)
+        pdf_path = await _run_conversion(input_path, content_hash, deck, conversion_options)
+    except HTTPException:
+        _cleanup_paths(input_path)
+        raise
     except FileNotFoundError as exc:
         # Likely missing expected output file
         # Cleanup upload before raising
@@ -144,7 +810,7 @@ async def convert(background_tasks: BackgroundTasks, file: UploadFile = File(...
         raise HTTPException(status_code=500, detail=f"Conversion failed: {exc}")
 
     # Return as a file response with a friendly filename derived from original
-    download_name = f"{Path(file.filename).stem}.pdf"
+    download_name = f"{Path(filename).stem}.pdf"
 
     # Schedule cleanup after response is sent
     background_tasks.add_task(_cleanup_paths, input_path, pdf_path)
@@ -153,54 +819,69 @@ async def convert(background_tasks: BackgroundTasks, file: UploadFile = File(...
         path=str(pdf_path),
         media_type="application/pdf",
         filename=download_name,
+        headers=_deck_headers(deck),
         background=background_tasks,
     )
 
 
 @app.post("/convert_multipart")
-async def convert_multipart(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def convert_multipart(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: Optional[UploadFile] = File(None),
+    filename: Optional[str] = None,
+    page_range: Optional[str] = None,
+    export_profile: Optional[str] = None,
+):
     """
     Upload a PPT/PPTX and receive the converted PDF wrapped as multipart/form-data
     with a single field named "file" (compatible with downstream `file_parse`).
+    `page_range` (e.g. "1-5") renders only those slides; `export_profile`
+    (draft, standard, archival) selects the PDF export settings.
     """
-    if not file or not file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
-
-    ext = _safe_ext(file.filename)
+    filename = _upload_filename(request, file, filename)
+    ext = _safe_ext(filename)
     if ext not in {".ppt", ".pptx"}:
         raise HTTPException(status_code=400, detail="Only .ppt or .pptx files are supported")
+    conversion_options = _conversion_options(page_range, export_profile)
 
     unique_stem = uuid.uuid4().hex
     input_path = UPLOAD_DIR / f"{unique_stem}{ext}"
 
-    try:
-        with input_path.open("wb") as out_f:
-            shutil.copyfileobj(file.file, out_f)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Failed to save upload: {exc}")
+    content_hash = await _save_upload(request, file, input_path)
+    deck = await _probe_upload(input_path)
 
     try:
-        pdf_path = convert_pptx_to_pdf(input_path, OUTPUT_DIR)
-        pdf_bytes = pdf_path.read_bytes()
+        pdf_path = await _run_conversion(input_path, content_hash, deck, conversion_options)
+        pdf_size = pdf_path.stat().st_size
+    except HTTPException:
+        _cleanup_paths(input_path)
+        raise
     except Exception as exc:
         _cleanup_paths(input_path)
         raise HTTPException(status_code=500, detail=f"Conversion failed: {exc}")
 
     # Friendly filename matches original stem
-    download_name = f"{Path(file.filename).stem}.pdf"
+    download_name = f"{Path(filename).stem}.pdf"
 
-    # Build multipart body with field name 'file'
-    body, content_type_header = _build_multipart_file(
+    # Multipart body with field name 'file', streamed from disk
+    multipart_headers, footer, content_type_header = _build_multipart_envelope(
         field_name="file",
         filename=download_name,
-        content=pdf_bytes,
         content_type="application/pdf",
     )
+    headers = _deck_headers(deck)
+    headers["Content-Length"] = str(len(multipart_headers) + pdf_size + len(footer))
 
     # Cleanup temp files after response is sent
     background_tasks.add_task(_cleanup_paths, input_path, pdf_path)
 
-    return Response(content=body, media_type=content_type_header, background=background_tasks)
+    return StreamingResponse(
+        _iter_multipart_file(multipart_headers, pdf_path, footer),
+        media_type=content_type_header,
+        headers=headers,
+        background=background_tasks,
+    )
 
 
 def _resolve_parser_url(query_override: Optional[str], header_override: Optional[str]) -> str:
@@ -211,149 +892,676 @@ def _resolve_parser_url(query_override: Optional[str], header_override: Optional
     return url
 
 
+@dataclass
+class ParserOptions:
+    """Tuning parameters for the downstream parser, accepted as query params."""
+
+    return_middle_json: bool = False
+    return_model_output: bool = False
+    return_md: bool = True
+    return_images: bool = False
+    end_page_id: int = 99999
+    parse_method: str = "auto"
+    start_page_id: int = 0
+    lang_list: str = "ch"
+    output_dir: str = "./output"
+    server_url: str = "string"
+    return_content_list: bool = False
+    backend: str = "pipeline"
+    table_enable: bool = True
+    formula_enable: bool = True
+
+    def form_data(self) -> Dict[str, str]:
+        """Form fields expected by the downstream parser."""
+        return {
+            "return_middle_json": str(self.return_middle_json).lower(),
+            "return_model_output": str(self.return_model_output).lower(),
+            "return_md": str(self.return_md).lower(),
+            "return_images": str(self.return_images).lower(),
+            "end_page_id": str(self.end_page_id),
+            "parse_method": self.parse_method,
+            "start_page_id": str(self.start_page_id),
+            "lang_list": self.lang_list,
+            "output_dir": self.output_dir,
+            "server_url": self.server_url,
+            "return_content_list": str(self.return_content_list).lower(),
+            "backend": self.backend,
+            "table_enable": str(self.table_enable).lower(),
+            "formula_enable": str(self.formula_enable).lower(),
+        }
+
+
+def _parser_page_window(
+    options: ParserOptions,
+    deck: DeckProfile,
+    export_profile: Optional[str] = None,
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Render only the slides the parser is asked for.
+
+    start_page_id/end_page_id are 0-based pages of the full PDF. They equal
+    slide numbers only when every slide is exported, i.e. the deck has no
+    hidden slides or the export profile includes them. In that case, when
+    they select a strict subset of a deck with a known slide count, the
+    matching page range is returned together with form fields rebased onto
+    the shorter PDF; otherwise the range is None and the fields are unchanged.
+    """
+    form_data = options.form_data()
+    start = max(options.start_page_id, 0)
+    if not PARSER_PAGE_WINDOW or deck.slides is None or options.end_page_id < start or start >= deck.slides:
+        return None, form_data
+    profile = export_profile or PDF_EXPORT_PROFILE
+    exports_hidden = profile is not None and EXPORT_PROFILES.get(profile, {}).get("ExportHiddenSlides", False)
+    if deck.hidden_slides != 0 and not exports_hidden:
+        return None, form_data
+    last = min(options.end_page_id, deck.slides - 1)
+    if start == 0 and last == deck.slides - 1:
+        return None, form_data
+    form_data["start_page_id"] = "0"
+    form_data["end_page_id"] = str(last - start)
+    return f"{start + 1}-{last + 1}", form_data
+
+
+# A JSON document starts with one of these after optional whitespace
+_JSON_WHITESPACE = b" \t\r\n"
+_JSON_START_BYTES = {bytes([c]) for c in b'{["-0123456789tfn'}
+
+# Parser URL -> (accepted upload field name, monotonic expiry), least recently used first
+_parser_fields: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+
+def _known_parser_field(target_url: str) -> Optional[str]:
+    entry = _parser_fields.get(target_url)
+    if entry is None:
+        return None
+    if entry[1] < time.monotonic():
+        _parser_fields.pop(target_url, None)
+        return None
+    _parser_fields.move_to_end(target_url)
+    return entry[0]
+
+
+def _remember_parser_field(target_url: str, field_name: str) -> None:
+    _parser_fields[target_url] = (field_name, time.monotonic() + PARSER_FIELD_CACHE_TTL)
+    _parser_fields.move_to_end(target_url)
+    while len(_parser_fields) > PARSER_FIELD_CACHE_SIZE:
+        _parser_fields.popitem(last=False)
+
+
+@dataclass
+class ParserReply:
+    """A parser answer; `body` streams the response bytes and closes the connection when exhausted."""
+
+    status_code: int
+    media_type: str
+    body: AsyncIterator[bytes]
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.body])
+
+    async def json(self) -> Any:
+        content = await self.read()
+        try:
+            return json.loads(content)
+        except ValueError:
+            text = content[:1000].decode("utf-8", "replace")
+            logger.error("Downstream returned invalid JSON. status=%s snippet=%s", self.status_code, text)
+            raise HTTPException(status_code=502, detail=f"Downstream returned non-JSON (status {self.status_code}). Snippet: {text}")
+
+
+async def _open_parser_body(resp: httpx.Response) -> AsyncIterator[bytes]:
+    """
+    Check from its leading bytes that a streamed parser response is JSON and
+    return an iterator over the whole body. Raises HTTPException(502) with a
+    snippet otherwise, as parsing the body would.
+    """
+    chunks = resp.aiter_bytes()
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if head.lstrip(_JSON_WHITESPACE):
+            break
+    if head.lstrip(_JSON_WHITESPACE)[:1] not in _JSON_START_BYTES:
+        # Read a little more for the error snippet
+        async for chunk in chunks:
+            head += chunk
+            if len(head) >= 1000:
+                break
+        await resp.aclose()
+        text = head[:1000].decode("utf-8", "replace")
+        logger.error("Downstream returned non-JSON. status=%s snippet=%s", resp.status_code, text)
+        raise HTTPException(status_code=502, detail=f"Downstream returned non-JSON (status {resp.status_code}). Snippet: {text}")
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            yield head
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await resp.aclose()
+
+    return body()
+
+
+async def _call_parser(
+    pdf_path: Path,
+    download_name: str,
+    target_url: str,
+    form_data: Dict[str, str],
+    parser_query_params: Dict[str, str],
+) -> ParserReply:
+    """
+    POST the PDF to the parsing service and return its answer, with the body
+    still to be streamed.
+
+    Raises HTTPException(502) when the parser is unreachable or does not
+    answer with JSON.
+    """
+    logger.debug("Parser form fields: %s", form_data)
+    if parser_query_params:
+        logger.debug("Parser query params: %s", parser_query_params)
+
+    resp = None
+    try:
+        client = parser_client
+        headers = {"accept": "application/json"}
+        known_field = _known_parser_field(target_url)
+        # Start with the field this parser accepted before; otherwise try 'files', then 'file'
+        field_names = list(PARSER_FIELD_NAMES)
+        if known_field:
+            field_names = [known_field] + [name for name in field_names if name != known_field]
+
+        for field_name in field_names:
+            with pdf_path.open("rb") as f:
+                files = [(field_name, (download_name, f, "application/pdf"))]
+                request = client.build_request(
+                    "POST",
+                    target_url,
+                    params=parser_query_params or None,
+                    data=form_data,
+                    files=files,
+                    headers=headers,
+                )
+                attempt = await client.send(request, stream=True)
+            logger.info(
+                "Parser response (%s): status=%s, content-type=%s",
+                field_name, attempt.status_code, attempt.headers.get("content-type"),
+            )
+            if attempt.status_code < 400:
+                _remember_parser_field(target_url, field_name)
+                if resp is not None:
+                    await resp.aclose()
+                resp = attempt
+                break
+            # Keep the first error unless a fallback succeeds
+            if resp is None:
+                resp = attempt
+                # Error bodies are small; read it so the connection is free for the retry
+                await resp.aread()
+            else:
+                await attempt.aclose()
+            if attempt.status_code not in PARSER_FIELD_MISMATCH_STATUSES:
+                break
+            if field_name == known_field:
+                # The parser may have changed; negotiate again with the other fields
+                _parser_fields.pop(target_url, None)
+            metrics.incr("parser_field_fallbacks")
+
+        body = await _open_parser_body(resp)
+
+    except HTTPException:
+        # Re-raise HTTPExceptions as-is
+        logger.exception("HTTP error while calling parser")
+        raise
+    except Exception as exc:
+        logger.exception("Exception while calling parser")
+        if resp is not None:
+            await resp.aclose()
+        raise HTTPException(status_code=502, detail=f"Failed to call parser: {exc}")
+
+    media_type = resp.headers.get("content-type", "application/json")
+    return ParserReply(resp.status_code, media_type, body)
+
+
+def _parser_cache_key(
+    content_hash: str,
+    options: ConversionOptions,
+    download_name: str,
+    target_url: str,
+    form_data: Dict[str, str],
+    parser_query_params: Dict[str, str],
+) -> str:
+    # The conversion key identifies the PDF; its bytes differ between conversions (timestamps).
+    # The file name is part of the upload, and parsers such as MinerU key their results by it.
+    fields = {
+        "conversion": _conversion_cache_key(content_hash, options),
+        "filename": download_name,
+        "url": target_url,
+        "form": form_data,
+        "query": parser_query_params,
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _open_cached_parser_reply(key: str) -> Optional[Tuple[BinaryIO, int, str]]:
+    """Open a parser cache entry past its header; (file, status, media type), or None on a miss."""
+    path = parser_cache.get(key)
+    if path is None:
+        return None
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        # Evicted by another process since the lookup
+        return None
+    try:
+        header = json.loads(f.readline())
+        return f, int(header["status_code"]), str(header["media_type"])
+    except (ValueError, KeyError, TypeError) as exc:
+        f.close()
+        logger.warning("Dropping corrupt parser cache entry %s: %s", path.name, exc)
+        path.unlink(missing_ok=True)
+        return None
+
+
+async def _cached_parser_reply(key: str) -> Optional[ParserReply]:
+    """A stored parser answer; entries are a JSON header line followed by the response body."""
+    if parser_cache is None:
+        return None
+    loop = asyncio.get_running_loop()
+    entry = await loop.run_in_executor(None, _open_cached_parser_reply, key)
+    if entry is None:
+        return None
+    f, status_code, media_type = entry
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            f.close()
+
+    return ParserReply(status_code, media_type, body())
+
+
+def _cache_parser_reply(reply: ParserReply, key: str) -> ParserReply:
+    """Store a successful answer in the parser cache as its body is consumed, once it was read to the end."""
+    if parser_cache is None or not 200 <= reply.status_code < 300:
+        return reply
+    loop = asyncio.get_running_loop()
+    header = json.dumps({"status_code": reply.status_code, "media_type": reply.media_type}).encode("utf-8") + b"\n"
+
+    async def body() -> AsyncIterator[bytes]:
+        tmp = OUTPUT_DIR / f"parse-{uuid.uuid4().hex}.tmp"
+        try:
+            with tmp.open("wb") as f:
+                f.write(header)
+                async for chunk in reply.body:
+                    await loop.run_in_executor(None, f.write, chunk)
+                    yield chunk
+            await loop.run_in_executor(None, parser_cache.put, key, tmp)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    return replace(reply, body=body())
+
+
+async def _parser_response(reply: ParserReply, headers: Dict[str, str], background: BackgroundTasks):
+    """The parser's answer as this service's response: passed through as is, or re-encoded JSON."""
+    if not PARSER_PASSTHROUGH:
+        try:
+            payload = await reply.json()
+        except Exception:
+            # Starlette drops the background tasks of a handler that raises,
+            # so the temporary files would stay behind
+            await background()
+            raise
+        return JSONResponse(status_code=reply.status_code, content=payload, headers=headers, background=background)
+    return StreamingResponse(
+        reply.body,
+        status_code=reply.status_code,
+        media_type=reply.media_type,
+        headers=headers,
+        background=background,
+    )
+
+
 @app.post("/convert_and_parse")
 async def convert_and_parse(
     request: Request,
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    filename: Optional[str] = None,
     parser_url: Optional[str] = None,
     x_parser_url: Optional[str] = Header(default=None, alias="X-Parser-Url"),
+    export_profile: Optional[str] = None,
     # Optional tuning parameters for the downstream parser (as query params)
-    return_middle_json: bool = False,
-    return_model_output: bool = False,
-    return_md: bool = True,
-    return_images: bool = False,
-    end_page_id: int = 99999,
-    parse_method: str = "auto",
-    start_page_id: int = 0,
-    lang_list: str = "ch",
-    output_dir: str = "./output",
-    server_url: str = "string",
-    return_content_list: bool = False,
-    backend: str = "pipeline",
-    table_enable: bool = True,
-    formula_enable: bool = True,
+    options: ParserOptions = Depends(),
 ):
     """
     Upload a PPT/PPTX, convert it to PDF, call an external PDF parsing service,
     and return the parsing service's JSON response.
     """
-    if not file or not file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
-
-    ext = _safe_ext(file.filename)
+    filename = _upload_filename(request, file, filename)
+    ext = _safe_ext(filename)
     if ext not in {".ppt", ".pptx"}:
         raise HTTPException(status_code=400, detail="Only .ppt or .pptx files are supported")
+    _conversion_options(export_profile=export_profile)
+    # Determine target parsing service URL (query > header > env > default)
+    target_url = _resolve_parser_url(parser_url, x_parser_url)
+    parser_query_params = _parser_query_params(request)
 
     unique_stem = uuid.uuid4().hex
     input_path = UPLOAD_DIR / f"{unique_stem}{ext}"
 
-    try:
-        with input_path.open("wb") as out_f:
-            shutil.copyfileobj(file.file, out_f)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Failed to save upload: {exc}")
+    content_hash = await _save_upload(request, file, input_path)
+    deck = await _probe_upload(input_path)
+    # Slides outside start_page_id..end_page_id are not rendered at all
+    page_range, form_data = _parser_page_window(options, deck, export_profile)
+    conversion_options = _conversion_options(page_range, export_profile)
+
+    download_name = f"{Path(filename).stem}.pdf"
+    # A deck parsed before with the same parameters needs neither conversion nor parser
+    parse_key = _parser_cache_key(content_hash, conversion_options, download_name, target_url, form_data, parser_query_params)
+    cached = await _cached_parser_reply(parse_key)
+    if cached is not None:
+        logger.info("Serving cached parser response for %s", input_path.name)
+        background_tasks.add_task(_cleanup_paths, input_path)
+        return await _parser_response(cached, _deck_headers(deck), background_tasks)
 
-    # Convert in a thread to avoid blocking the event loop
     try:
-        loop = asyncio.get_running_loop()
-        pdf_path: Path = await loop.run_in_executor(None, convert_pptx_to_pdf, input_path, OUTPUT_DIR)
+        pdf_path = await _run_conversion(input_path, content_hash, deck, conversion_options)
+    except HTTPException:
+        _cleanup_paths(input_path)
+        raise
     except Exception as exc:
         _cleanup_paths(input_path)
         raise HTTPException(status_code=500, detail=f"Conversion failed: {exc}")
 
-    download_name = f"{Path(file.filename).stem}.pdf"
     try:
         size_bytes = pdf_path.stat().st_size
     except Exception:
         size_bytes = -1
     logger.info("Converted %s -> %s (%s bytes)", input_path.name, pdf_path.name, size_bytes)
 
-    # Determine target parsing service URL (query > header > env > default)
-    target_url = _resolve_parser_url(parser_url, x_parser_url)
-    logger.info("Posting to parser: %s", target_url)
-
-    # Prepare form fields expected by the downstream parser
-    form_data = {
-        "return_middle_json": str(return_middle_json).lower(),
-        "return_model_output": str(return_model_output).lower(),
-        "return_md": str(return_md).lower(),
-        "return_images": str(return_images).lower(),
-        "end_page_id": str(end_page_id),
-        "parse_method": parse_method,
-        "start_page_id": str(start_page_id),
-        "lang_list": lang_list,
-        "output_dir": output_dir,
-        "server_url": server_url,
-        "return_content_list": str(return_content_list).lower(),
-        "backend": backend,
-        "table_enable": str(table_enable).lower(),
-        "formula_enable": str(formula_enable).lower(),
-    }
-    parser_query_params = _parser_query_params(request)
-    logger.debug("Parser form fields: %s", form_data)
-    if parser_query_params:
-        logger.debug("Parser query params: %s", parser_query_params)
-
-    # Call downstream parsing service with the generated PDF
     try:
-        timeout = httpx.Timeout(300.0, connect=20.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            headers = {"accept": "application/json"}
-
-            # Try with field name 'files'
-            with pdf_path.open("rb") as f1:
-                files1 = [("files", (download_name, f1, "application/pdf"))]
-                resp = await client.post(
-                    target_url,
-                    params=parser_query_params or None,
-                    data=form_data,
-                    files=files1,
-                    headers=headers,
-                )
-                logger.info("Parser response (files): status=%s, content-type=%s", resp.status_code, resp.headers.get("content-type"))
-
-            # If the server clearly rejects, try alternative field name 'file'
-            if resp.status_code >= 400:
-                with pdf_path.open("rb") as f2:
-                    files2 = [("file", (download_name, f2, "application/pdf"))]
-                    resp2 = await client.post(
-                        target_url,
-                        params=parser_query_params or None,
-                        data=form_data,
-                        files=files2,
-                        headers=headers,
-                    )
-                    logger.info("Parser response (file): status=%s, content-type=%s", resp2.status_code, resp2.headers.get("content-type"))
-                # Prefer successful response if fallback worked
-                if 200 <= resp2.status_code < 300:
-                    resp = resp2
-
-        # Try to decode JSON; if not JSON, raise 502 with snippet
-        try:
-            payload = resp.json()
-        except ValueError:
-            text = resp.text[:1000]
-            logger.error("Downstream returned non-JSON. status=%s snippet=%s", resp.status_code, text)
-            raise HTTPException(status_code=502, detail=f"Downstream returned non-JSON (status {resp.status_code}). Snippet: {text}")
+        logger.info("Posting to parser: %s", target_url)
+        reply = await _call_parser(pdf_path, download_name, target_url, form_data, parser_query_params)
+    except HTTPException:
+        _cleanup_paths(input_path, pdf_path)
+        raise
 
-        # Cleanup temp files after sending response
-        background_tasks.add_task(_cleanup_paths, input_path, pdf_path)
+    # Cleanup temp files after sending response
+    background_tasks.add_task(_cleanup_paths, input_path, pdf_path)
 
-        return JSONResponse(status_code=resp.status_code, content=payload)
+    return await _parser_response(_cache_parser_reply(reply, parse_key), _deck_headers(deck), background_tasks)
 
-    except HTTPException:
-        # Re-raise HTTPExceptions as-is
-        logger.exception("HTTP error while calling parser")
-        _cleanup_paths(input_path, pdf_path)
+
+async def _run_job_conversion(
+    input_path: Path,
+    job: Job,
+    deck: DeckProfile,
+    options: ConversionOptions,
+    preview: bool = False,
+) -> Path:
+    try:
+        return await _run_conversion(input_path, job.content_hash, deck, options, preview)
+    except HTTPException as exc:
+        if exc.status_code == QUEUE_FULL_STATUS:
+            # Jobs wait for capacity instead of failing
+            raise JobRetryError(exc.detail, float(exc.headers["Retry-After"]))
         raise
+
+
+async def _run_job_preview(job: Job, options: ConversionOptions, slides: int) -> None:
+    """
+    Convert the first `slides` slides as a deck of their own, so clients can
+    show them while the whole deck is converting. Failures, including a full
+    queue, only cost the preview.
+    """
+    loop = asyncio.get_running_loop()
+    workdir = OUTPUT_DIR / f"preview-{uuid.uuid4().hex}"
+    workdir.mkdir()
+    chunk_path = workdir / f"{job.id}-preview.pptx"
+    try:
+        slides = await loop.run_in_executor(None, extract_slides, job.input_path, chunk_path, slides)
+        deck = await _probe_upload(chunk_path)
+        pdf_path = await _run_job_conversion(chunk_path, job, deck, options, preview=True)
     except Exception as exc:
-        logger.exception("Exception while calling parser")
-        _cleanup_paths(input_path, pdf_path)
-        raise HTTPException(status_code=502, detail=f"Failed to call parser: {exc}")
+        logger.warning("Preview of job %s failed: %s", job.id, getattr(exc, "detail", exc))
+        return
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    preview_path = JOBS_DIR / f"{job.id}.preview.pdf"
+    os.replace(pdf_path, preview_path)
+    metrics.incr("job_previews")
+    await job_manager.update(job, preview_path=str(preview_path), preview_slides=slides)
+
+
+async def _store_job_reply(job: Job, reply: ParserReply) -> None:
+    result_path = JOBS_DIR / f"{job.id}.json"
+    if PARSER_PASSTHROUGH:
+        await _write_stream(reply.body, result_path)
+        media_type = reply.media_type
+    else:
+        body = json.dumps(await reply.json()).encode("utf-8")
+        await asyncio.get_running_loop().run_in_executor(None, result_path.write_bytes, body)
+        media_type = "application/json"
+    await job_manager.update(job, result_path=str(result_path), result_status=reply.status_code, result_media_type=media_type)
+
+
+async def _run_job(job: Job) -> None:
+    """Job runner: the conversion and parser-forwarding steps of the sync endpoints."""
+    input_path = Path(job.input_path)
+    # Jobs queued by older versions carry no deck profile
+    deck = DeckProfile.from_dict(job.deck) if job.deck else await _probe_upload(input_path)
+    options = ConversionOptions(**job.options.get("conversion", {}))
+    download_name = job.options.get("download_name") or f"{Path(job.filename).stem}.pdf"
+    parse_key = None
+    if job.kind == "parse":
+        parse_key = _parser_cache_key(
+            job.content_hash,
+            options,
+            download_name,
+            job.options["parser_url"],
+            job.options["form_data"],
+            job.options["parser_query_params"],
+        )
+        cached = await _cached_parser_reply(parse_key)
+        if cached is not None:
+            logger.info("Serving cached parser response for job %s", job.id)
+            await _store_job_reply(job, cached)
+            return
+    preview_slides = job.options.get("preview_slides")
+    preview = None
+    if preview_slides and job.preview_path is None:
+        # Converted alongside the whole deck; being cheaper, it is admitted first
+        preview = asyncio.create_task(_run_job_preview(job, options, preview_slides))
+    await job_manager.update(job, stage="converting")
+    try:
+        pdf_path = await _run_job_conversion(input_path, job, deck, options)
+    finally:
+        # A preview still waiting once the whole deck is done is not needed any more
+        if preview is not None and not preview.done():
+            preview.cancel()
+        if preview is not None:
+            await asyncio.gather(preview, return_exceptions=True)
+
+    if job.kind == "pdf":
+        result_path = JOBS_DIR / f"{job.id}.pdf"
+        os.replace(pdf_path, result_path)
+        await job_manager.update(job, result_path=str(result_path), result_status=200, result_media_type="application/pdf")
+        return
+
+    await job_manager.update(job, stage="parsing")
+    try:
+        reply = await _call_parser(
+            pdf_path,
+            download_name,
+            job.options["parser_url"],
+            job.options["form_data"],
+            job.options["parser_query_params"],
+        )
+    finally:
+        _cleanup_paths(pdf_path)
+    await _store_job_reply(job, _cache_parser_reply(reply, parse_key))
+
+
+async def _get_job(job_id: str) -> Job:
+    job = await job_manager.get(job_id) if job_manager is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    filename: Optional[str] = None,
+    parse: bool = False,
+    page_range: Optional[str] = None,
+    export_profile: Optional[str] = None,
+    preview_slides: Optional[int] = None,
+    parser_url: Optional[str] = None,
+    x_parser_url: Optional[str] = Header(default=None, alias="X-Parser-Url"),
+    options: ParserOptions = Depends(),
+):
+    """
+    Upload a PPT/PPTX and return a job id immediately. The job converts the
+    deck and, with `parse=true`, forwards the PDF to the parser using the same
+    parameters as /convert_and_parse. An explicit `page_range` is rendered
+    as given; otherwise parse jobs render start_page_id..end_page_id only.
+    With `preview_slides`, the first slides of a .pptx are converted first and
+    served from /jobs/{id}/preview.
+    """
+    filename = _upload_filename(request, file, filename)
+    ext = _safe_ext(filename)
+    if ext not in {".ppt", ".pptx"}:
+        raise HTTPException(status_code=400, detail="Only .ppt or .pptx files are supported")
+
+    conversion_options = _conversion_options(page_range, export_profile)
+    target_url = _resolve_parser_url(parser_url, x_parser_url) if parse else None
+    if preview_slides is None:
+        preview_slides = JOB_PREVIEW_SLIDES
+    if preview_slides < 0:
+        raise HTTPException(status_code=400, detail="preview_slides must not be negative")
+
+    job_id = job_manager.new_id()
+    input_path = UPLOAD_DIR / f"{job_id}{ext}"
+    content_hash = await _save_upload(request, file, input_path)
+    deck = await _probe_upload(input_path)
+
+    job_options: Dict[str, Any] = {}
+    if parse:
+        form_data = options.form_data()
+        if page_range is None:
+            parser_range, form_data = _parser_page_window(options, deck, export_profile)
+            conversion_options = _conversion_options(parser_range, export_profile)
+        job_options = {
+            "parser_url": target_url,
+            "form_data": form_data,
+            "parser_query_params": _parser_query_params(request),
+            "download_name": f"{Path(filename).stem}.pdf",
+        }
+    job_options["conversion"] = conversion_options.as_dict()
+    # Ranged conversions are small already; legacy .ppt files cannot be cut
+    if preview_slides and conversion_options.page_range is None and deck.slides and deck.slides > preview_slides:
+        job_options["preview_slides"] = preview_slides
+    job = Job(
+        id=job_id,
+        kind="parse" if parse else "pdf",
+        filename=filename,
+        input_path=str(input_path),
+        content_hash=content_hash,
+        options=job_options,
+        deck={**deck.as_dict(), "predicted_seconds": round(_predicted_seconds(deck), 1), "lane": _lane(deck)},
+    )
+    try:
+        await job_manager.submit(job)
+    except JobQueueFullError as exc:
+        _cleanup_paths(input_path)
+        raise HTTPException(status_code=QUEUE_FULL_STATUS, detail=str(exc), headers={"Retry-After": str(admission.retry_after())})
+    return JSONResponse(status_code=202, content=job.public(), headers={"Location": f"/jobs/{job.id}"})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0.0):
+    """Job status; with `wait`, long-poll up to that many seconds for the job to finish."""
+    job = await _get_job(job_id)
+    if wait > 0 and not job.done:
+        job = await job_manager.wait(job, min(wait, JOB_MAX_WAIT))
+    return JSONResponse(job.public())
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events with the job status after every change, until it finishes."""
+    job = await _get_job(job_id)
+
+    async def stream():
+        async for snapshot in job_manager.events(job):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {snapshot.state}\ndata: {json.dumps(snapshot.public())}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Stream the finished job's PDF or parser JSON."""
+    job = await _get_job(job_id)
+    if not job.done:
+        return JSONResponse(status_code=202, content=job.public(), headers={"Retry-After": "1"})
+    if job.state == FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    filename = f"{Path(job.filename).stem}.pdf" if job.kind == "pdf" else None
+    return FileResponse(
+        path=job.result_path,
+        status_code=job.result_status or 200,
+        media_type=job.result_media_type,
+        filename=filename,
+    )
+
+
+@app.get("/jobs/{job_id}/preview")
+async def job_preview(job_id: str):
+    """Stream the PDF of the job's first slides, or the whole PDF once a conversion job is done."""
+    job = await _get_job(job_id)
+    if job.preview_path:
+        return FileResponse(
+            path=job.preview_path,
+            media_type="application/pdf",
+            filename=f"{Path(job.filename).stem}-preview.pdf",
+            headers={"X-Preview-Slides": str(job.preview_slides)},
+        )
+    if job.state == FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if job.done and job.kind == "pdf":
+        return FileResponse(path=job.result_path, media_type="application/pdf", filename=f"{Path(job.filename).stem}.pdf")
+    if job.done or not job.options.get("preview_slides"):
+        raise HTTPException(status_code=404, detail="Job has no preview")
+    return JSONResponse(status_code=202, content=job.public(), headers={"Retry-After": "1"})
 
 
 # Optional root
 @app.get("/")
 def root():
-    return {"service": "pptx2pdf", "endpoints": ["GET /healthz", "POST /convert"]}
+    return {
+        "service": "pptx2pdf",
+        "endpoints": [
+            "GET /healthz",
+            "GET /stats",
+            "POST /convert",
+            "POST /jobs",
+            "GET /jobs/{id}",
+            "GET /jobs/{id}/events",
+            "GET /jobs/{id}/result",
+            "GET /jobs/{id}/preview",
+        ],
+    }
@@ -0,0 +1,154 @@
+import logging
+import math
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from libreoffice import ConversionOptions, convert_pptx_batch
+from profiles import ProfileSlots
+
+logger = logging.getLogger("pptx2pdf.batching")
+
+_Item = Tuple[Path, Optional[float], ConversionOptions, Future]
+
+
+class BatchConverter:
+    """
+    Micro-batching front end for the LibreOffice CLI.
+
+    Conversions submitted within `window` seconds of each other (up to
+    `max_size`) are converted by one soffice invocation, amortizing process
+    startup over a burst of small decks. One invocation applies one set of
+    export options, so a window's documents are split into a batch per
+    distinct ConversionOptions. Batches run in parallel, one per free profile
+    slot, and a group is spread over all slots before any batch takes more
+    than one document, since documents inside one soffice run are converted
+    one after another.
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, os.PathLike],
+        profile_slots: ProfileSlots,
+        window: float = 0.05,
+        max_size: int = 8,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.output_dir = Path(output_dir)
+        self.profile_slots = profile_slots
+        self.window = window
+        self.max_size = max_size
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=profile_slots.count, thread_name_prefix="soffice-batch")
+        self._collector = threading.Thread(target=self._collect, name="soffice-batch-collector", daemon=True)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._documents = 0
+
+    def start(self) -> None:
+        self._collector.start()
+
+    def submit(
+        self,
+        input_path: Union[str, os.PathLike],
+        timeout: Optional[float] = None,
+        options: Optional[ConversionOptions] = None,
+    ) -> Future:
+        """Queue a conversion; the future resolves to <output_dir>/<stem>.pdf."""
+        future: Future = Future()
+        self._queue.put((Path(input_path), timeout, options or ConversionOptions(), future))
+        return future
+
+    def convert(
+        self,
+        input_path: Union[str, os.PathLike],
+        timeout: Optional[float] = None,
+        options: Optional[ConversionOptions] = None,
+    ) -> Path:
+        return self.submit(input_path, timeout, options).result()
+
+    def _collect(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch: List[_Item] = [first]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            groups: Dict[ConversionOptions, List[_Item]] = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            for group in groups.values():
+                size = math.ceil(len(group) / self.profile_slots.count)
+                for i in range(0, len(group), size):
+                    self._executor.submit(self._run_batch, group[i:i + size])
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[_Item]) -> None:
+        batch_dir = self.output_dir / f"batch-{uuid.uuid4().hex}"
+        # Documents are converted one after another inside the single process
+        timeouts = [t for _, t, _, _ in batch]
+        timeout = None if None in timeouts else sum(timeouts)
+        options = batch[0][2]
+        try:
+            with self.profile_slots.slot() as profile_dir:
+                outputs = convert_pptx_batch(
+                    [p for p, _, _, _ in batch], batch_dir, profile_dir=profile_dir, timeout=timeout, options=options
+                )
+            for input_path, _, _, future in batch:
+                pdf_path = outputs.get(input_path)
+                if pdf_path is None:
+                    future.set_exception(FileNotFoundError(f"Expected PDF not found for {input_path.name}"))
+                    continue
+                final_path = self.output_dir / pdf_path.name
+                os.replace(pdf_path, final_path)
+                future.set_result(final_path)
+        except Exception as exc:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._documents += len(batch)
+        logger.debug("Converted batch of %s document(s)", len(batch))
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            batches, documents = self._batches, self._documents
+        return {
+            "enabled": True,
+            "window_ms": round(self.window * 1000),
+            "max_size": self.max_size,
+            "pending": self._queue.qsize(),
+            "batches": batches,
+            "documents": documents,
+            "avg_batch_size": round(documents / batches, 2) if batches else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._collector.join(timeout=5)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,65 @@
+"""
+Compare PDF export profiles on real decks.
+
+    python bench.py slides.pptx other.pptx --repeat 3
+    python bench.py slides.pptx --profiles draft standard
+
+Each deck is converted with every profile (plus LibreOffice's own defaults
+as "default") by a fresh soffice process, and the median wall time and the
+resulting PDF size are printed per deck and profile.
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from libreoffice import EXPORT_PROFILES, ConversionOptions, convert_pptx_to_pdf
+
+
+def _bench(deck: Path, options: ConversionOptions, repeat: int, workdir: Path):
+    times = []
+    size = 0
+    for i in range(repeat):
+        outdir = workdir / f"{deck.stem}-{options.profile or 'default'}-{i}"
+        started = time.perf_counter()
+        pdf_path = convert_pptx_to_pdf(deck, outdir, profile_dir=workdir / "profile", options=options)
+        times.append(time.perf_counter() - started)
+        size = pdf_path.stat().st_size
+        shutil.rmtree(outdir, ignore_errors=True)
+    return statistics.median(times), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF export profiles")
+    parser.add_argument("decks", nargs="+", type=Path, help="PPT/PPTX files to convert")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=["default", *EXPORT_PROFILES],
+        choices=["default", *EXPORT_PROFILES],
+        help="profiles to compare (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="conversions per deck and profile (median is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pptx2pdf-bench-") as tmp:
+        workdir = Path(tmp)
+        # Warm-up: the first run initializes the LibreOffice profile
+        convert_pptx_to_pdf(args.decks[0], workdir / "warmup", profile_dir=workdir / "profile")
+
+        print(f"{'deck':<32} {'profile':<10} {'seconds':>8} {'PDF bytes':>12} {'vs default':>10}")
+        for deck in args.decks:
+            baseline = None
+            for name in args.profiles:
+                options = ConversionOptions(profile=None if name == "default" else name)
+                seconds, size = _bench(deck, options, args.repeat, workdir)
+                if name == "default":
+                    baseline = size
+                ratio = f"{size / baseline:.2f}x" if baseline else "-"
+                print(f"{deck.name[:32]:<32} {name:<10} {seconds:>8.2f} {size:>12,} {ratio:>10}")
+
+
+if __name__ == "__main__":
+    main()
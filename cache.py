@@ -0,0 +1,201 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import metrics
+
+logger = logging.getLogger("pptx2pdf.cache")
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    """Hardlink `src` to `dest`, copying when they are on different filesystems."""
+    try:
+        os.link(src, dest)
+    except OSError as exc:
+        if isinstance(exc, FileNotFoundError):
+            raise
+        shutil.copyfile(src, dest)
+
+
+class DiskCache:
+    """
+    Content-addressed file cache with LRU eviction, safe to share between processes.
+
+    Entries are immutable files named after their key. Writes go to a
+    temporary file that is atomically renamed into place. The mtime of an
+    entry is the time it was stored, which `ttl` is measured against, and
+    every hit sets its atime, which orders eviction. All state lives in the
+    filesystem, so several uvicorn workers can use the same directory.
+    """
+
+    # Rescan the directory at most this often unless the local estimate says we are over
+    SCAN_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        root: Union[str, os.PathLike],
+        name: str,
+        max_bytes: int,
+        max_entries: int,
+        suffix: str = "",
+        ttl: Optional[float] = None,
+    ):
+        self.root = Path(root)
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.suffix = suffix
+        self.ttl = ttl
+        self._tmp_dir = self.root / "tmp"
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._approx_bytes = 0
+        self._approx_entries = 0
+        self._last_scan = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        try:
+            st = path.stat()
+            if self._expired(st.st_mtime):
+                path.unlink()
+                self._count("misses")
+                return None
+            # Record the use without touching the time the entry was stored
+            os.utime(path, (time.time(), st.st_mtime))
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return path
+
+    def get_copy(self, key: str, dest: Union[str, os.PathLike]) -> Optional[Path]:
+        """Materialize a hit at `dest` (hardlinked when possible)."""
+        path = self.get(key)
+        if path is None:
+            return None
+        dest = Path(dest)
+        try:
+            link_or_copy(path, dest)
+        except FileNotFoundError:
+            # Evicted by another process between get() and the link
+            return None
+        return dest
+
+    def put(self, key: str, src: Union[str, os.PathLike]) -> Path:
+        """Store a copy of `src` under `key`; `src` itself is left in place."""
+        src = Path(src)
+        final = self.path_for(key)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_dir / f"{uuid.uuid4().hex}{self.suffix}"
+        try:
+            link_or_copy(src, tmp)
+            # A hardlinked src keeps its own times; the entry is stored now
+            os.utime(tmp)
+            os.replace(tmp, final)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        size = final.stat().st_size
+        with self._lock:
+            self._stores += 1
+            self._approx_bytes += size
+            self._approx_entries += 1
+        metrics.incr(f"{self.name}_cache_stores")
+        self._maybe_evict()
+        return final
+
+    def _count(self, what: str) -> None:
+        with self._lock:
+            setattr(self, f"_{what}", getattr(self, f"_{what}") + 1)
+        metrics.incr(f"{self.name}_cache_{what}")
+
+    def _entries(self) -> List[Tuple[float, float, int, Path]]:
+        """(last used, stored at, size, path) of every entry."""
+        entries = []
+        for shard in self.root.iterdir():
+            if shard == self._tmp_dir or not shard.is_dir():
+                continue
+            for entry in os.scandir(shard):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_atime, st.st_mtime, st.st_size, Path(entry.path)))
+        return entries
+
+    def _maybe_evict(self) -> None:
+        with self._lock:
+            over = self._approx_bytes > self.max_bytes or self._approx_entries > self.max_entries
+            due = time.monotonic() - self._last_scan > self.SCAN_INTERVAL
+            if not (over or due):
+                return
+            self._last_scan = time.monotonic()
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete expired entries, then least recently used ones until the cache is within its limits."""
+        entries = []
+        evicted = 0
+        for entry in self._entries():
+            if self._expired(entry[1]):
+                try:
+                    entry[3].unlink()
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+            else:
+                entries.append(entry)
+        total = sum(size for _, _, size, _ in entries)
+        count = len(entries)
+        if total > self.max_bytes or count > self.max_entries:
+            entries.sort()
+            for _, _, size, path in entries:
+                if total <= self.max_bytes and count <= self.max_entries:
+                    break
+                try:
+                    path.unlink()
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+                count -= 1
+        with self._lock:
+            self._approx_bytes = total
+            self._approx_entries = count
+            self._evictions += evicted
+        if evicted:
+            metrics.incr(f"{self.name}_cache_evictions", evicted)
+            logger.debug("Evicted %s %s cache entries", evicted, self.name)
+
+    def status(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": True,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "approx_bytes": self._approx_bytes,
+                "approx_entries": self._approx_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    from workqueue import WorkQueue
+
+logger = logging.getLogger("pptx2pdf.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobRetryError(Exception):
+    """Raised by a runner when a job should go back to the queue after `delay` seconds."""
+
+    def __init__(self, message: str, delay: float):
+        super().__init__(message)
+        self.delay = delay
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str  # "pdf" or "parse"
+    filename: str
+    input_path: str
+    content_hash: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    # probe.DeckProfile of the upload plus the predicted conversion time
+    deck: Dict[str, Any] = field(default_factory=dict)
+    state: str = QUEUED
+    stage: str = QUEUED
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result_path: Optional[str] = None
+    result_status: Optional[int] = None
+    result_media_type: Optional[str] = None
+    # First slides of the deck, available while the rest is still converting
+    preview_path: Optional[str] = None
+    preview_slides: Optional[int] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    version: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def public(self) -> Dict[str, Any]:
+        """Status document returned by the jobs API."""
+        data = asdict(self)
+        for private in ("input_path", "result_path", "preview_path", "content_hash", "options"):
+            data.pop(private)
+        return data
+
+
+Runner = Callable[[Job], Awaitable[None]]
+
+
+class JobManager:
+    """
+    Asynchronous jobs on top of a `WorkQueue`.
+
+    Up to `workers` jobs run at once. A single dispatcher claims a job from
+    the queue whenever one of them is free (polling every `poll_interval`
+    while the queue is empty) and hands it to `runner`, which does the work
+    and fills in the job's result fields; with a shared queue, work therefore
+    flows to whichever node has free capacity. Leases of running jobs are
+    renewed every third of `lease_timeout`, so the jobs of a node that dies
+    are claimed again by another one, up to `max_attempts` runs in total.
+    Clients observe progress through `wait()` (long-poll) or `events()`
+    (SSE); jobs running elsewhere are followed by polling the queue. Finished
+    jobs and their result files are forgotten `ttl` seconds after completion.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        queue: "WorkQueue",
+        workers: int = 4,
+        max_queue: int = 1000,
+        ttl: float = 3600.0,
+        max_attempts: int = 3,
+        lease_timeout: float = 60.0,
+        poll_interval: float = 0.5,
+    ):
+        self.runner = runner
+        self.queue = queue
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        # Jobs running on this node
+        self._jobs: Dict[str, Job] = {}
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+        self._depth = 0
+        self._completed = 0
+        self._recovered = 0
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    async def start(self) -> None:
+        self._tasks.append(asyncio.create_task(self._dispatch(), name="job-dispatcher"))
+        self._tasks.append(asyncio.create_task(self._renew(), name="job-lease-renewal"))
+        self._tasks.append(asyncio.create_task(self._expire(), name="job-expiry"))
+
+    async def stop(self) -> None:
+        running = list(self._jobs.values())
+        tasks = self._tasks + list(self._running)
+        pending = set(tasks)
+        while pending:
+            for task in pending:
+                task.cancel()
+            # A cancellation can get lost, e.g. in wait_for before Python 3.12
+            # or in a queue client; cancel again until every task has ended
+            _, pending = await asyncio.wait(pending, timeout=1.0)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        # Hand unfinished work back instead of waiting for the leases to run out
+        for job in running:
+            if job.done:
+                await self.queue.complete(job)
+            else:
+                await self.queue.release(job)
+
+    async def submit(self, job: Job) -> Job:
+        self._depth = await self.queue.depth()
+        if self._depth >= self.max_queue:
+            raise JobQueueFullError("Job queue is full")
+        await self.queue.put(job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await self.queue.get(job_id)
+        return job
+
+    async def update(self, job: Job, **changes: Any) -> None:
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.version += 1
+        if not await self.queue.save(job):
+            logger.warning("Lost the lease on job %s; its progress is no longer recorded", job.id)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait(self, job: Job, timeout: float, version: Optional[int] = None) -> Job:
+        """
+        Wait up to `timeout` seconds for the job to finish, or, with `version`,
+        for any change past that version. Returns the latest state of the job.
+        """
+        def ready() -> bool:
+            nonlocal job
+            # A copy read from the queue goes stale once the job runs here
+            job = self._jobs.get(job.id, job)
+            return job.done or (version is not None and job.version > version)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Not running here: follow the shared record until it finishes or a
+        # local worker picks it up
+        while job.id not in self._jobs and not ready():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return job
+            await asyncio.sleep(min(self.poll_interval, remaining))
+            job = await self.queue.get(job.id) or job
+        if ready():
+            return job
+
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(ready), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def events(self, job: Job, heartbeat: float = 15.0) -> AsyncIterator[Optional[Job]]:
+        """Yield the job after every change until it finishes; None marks an idle heartbeat."""
+        version = -1
+        while True:
+            if job.version > version:
+                version = job.version
+                yield job
+                if job.done:
+                    return
+            before = job.version
+            job = await self.wait(job, heartbeat, version=version)
+            if job.version == before:
+                yield None
+
+    async def _claim(self) -> Job:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self.queue.claim(self.lease_timeout)
+            except Exception as exc:
+                logger.warning("Could not claim a job: %s", exc)
+                job = None
+            if job is not None:
+                return job
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self) -> None:
+        # One poller for the whole node: it only claims while a worker is free
+        free = asyncio.Semaphore(self.workers)
+        while True:
+            await free.acquire()
+            try:
+                job = await self._claim()
+            except BaseException:
+                free.release()
+                raise
+            self._jobs[job.id] = job
+            task = asyncio.create_task(self._work(job, free), name=f"job-{job.id}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _work(self, job: Job, free: asyncio.Semaphore) -> None:
+        try:
+            await self._run(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Job %s could not be recorded", job.id)
+        finally:
+            self._jobs.pop(job.id, None)
+            free.release()
+
+    async def _run(self, job: Job) -> None:
+        if job.done:
+            # Its node recorded the outcome but died before ending the lease
+            await self.queue.complete(job)
+            return
+        if job.state == RUNNING:
+            # The lease of the node that ran it expired
+            self._recovered += 1
+            logger.info("Recovered job %s after %s attempt(s)", job.id, job.attempts)
+        if job.attempts >= self.max_attempts:
+            await self._finish(job, FAILED, error=f"Gave up after {job.attempts} attempt(s)", error_status=500)
+            return
+        if not Path(job.input_path).exists():
+            await self._finish(job, FAILED, error="Upload was lost before the job could run", error_status=500)
+            return
+
+        await self.update(job, state=RUNNING, stage=RUNNING, attempts=job.attempts + 1, started_at=time.time())
+        try:
+            await self.runner(job)
+        except JobRetryError as exc:
+            logger.info("Requeueing job %s in %.1fs: %s", job.id, exc.delay, exc)
+            # Waiting for capacity does not count as an attempt
+            await self.update(job, state=QUEUED, stage=QUEUED, attempts=job.attempts - 1)
+            await self.queue.release(job, exc.delay)
+            return
+        except asyncio.CancelledError:
+            # Shutting down is not a failed attempt either
+            await self.update(job, state=QUEUED, stage=QUEUED, attempts=job.attempts - 1)
+            raise
+        except Exception as exc:
+            status = getattr(exc, "status_code", 500)
+            detail = getattr(exc, "detail", None) or str(exc)
+            logger.warning("Job %s failed: %s", job.id, detail)
+            await self._finish(job, FAILED, error=str(detail), error_status=status)
+        else:
+            await self._finish(job, SUCCEEDED)
+
+    async def _finish(self, job: Job, state: str, **changes: Any) -> None:
+        await self.update(job, state=state, stage=state, finished_at=time.time(), **changes)
+        await self.queue.complete(job)
+        self._completed += 1
+        # The upload is only needed while the job may still run
+        Path(job.input_path).unlink(missing_ok=True)
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            try:
+                await self.queue.extend(list(self._jobs), self.lease_timeout)
+                self._depth = await self.queue.depth()
+            except Exception as exc:
+                logger.warning("Could not renew job leases: %s", exc)
+
+    async def _expire(self) -> None:
+        while True:
+            await asyncio.sleep(min(60.0, self.ttl))
+            try:
+                expired = await self.queue.expire(time.time() - self.ttl)
+            except Exception as exc:
+                logger.warning("Could not expire jobs: %s", exc)
+                continue
+            for job in expired:
+                for path in (job.input_path, job.result_path, job.preview_path):
+                    if path:
+                        Path(path).unlink(missing_ok=True)
+
+    def status(self) -> dict:
+        return {
+            "queue": self.queue.describe(),
+            "workers": self.workers,
+            "running": len(self._jobs),
+            "queued": self._depth,
+            "max_queue": self.max_queue,
+            "completed": self._completed,
+            "recovered": self._recovered,
+        }
@@ -1,8 +1,121 @@
 import subprocess
+import json
 import os
+import re
 import shutil
+import signal
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import metrics
+
+_PAGE_RANGE_RE = re.compile(r"^\d+(-\d+)?(,\d+(-\d+)?)*$")
+
+# Named impress_pdf_Export settings, smallest and fastest first
+EXPORT_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Screen preview and parsing: 150 DPI JPEG images, no extras
+    "draft": {
+        "Quality": 60,
+        "ReduceImageResolution": True,
+        "MaxImageResolution": 150,
+        "ExportHiddenSlides": False,
+        "ExportNotesPages": False,
+        "UseTaggedPDF": False,
+    },
+    # Print quality at a sane size
+    "standard": {
+        "Quality": 85,
+        "ReduceImageResolution": True,
+        "MaxImageResolution": 300,
+        "ExportHiddenSlides": False,
+        "ExportNotesPages": False,
+        "UseTaggedPDF": False,
+    },
+    # Complete and faithful: original images, hidden slides, tagged PDF/A-2b
+    "archival": {
+        "UseLosslessCompression": True,
+        "ReduceImageResolution": False,
+        "ExportHiddenSlides": True,
+        "ExportNotesPages": False,
+        "UseTaggedPDF": True,
+        "SelectPdfVersion": 2,
+    },
+}
+
+
+class ConversionTimeoutError(TimeoutError):
+    """LibreOffice did not finish within the allotted time and was killed."""
+
+
+@dataclass(frozen=True)
+class ConversionOptions:
+    """
+    PDF export settings for a conversion, passed to LibreOffice's
+    impress_pdf_Export filter.
+
+    page_range: Slides to render, 1-based, in the filter's syntax
+        (e.g. "1-5" or "1,3,7-9"). None renders the whole deck.
+    profile: Name of an EXPORT_PROFILES entry, or None for LibreOffice's
+        own defaults.
+    """
+
+    page_range: Optional[str] = None
+    profile: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.profile is not None and self.profile not in EXPORT_PROFILES:
+            raise ValueError(f"Unknown export profile {self.profile!r}; expected one of {', '.join(EXPORT_PROFILES)}")
+        if self.page_range is not None:
+            page_range = self.page_range.replace(" ", "")
+            if not _PAGE_RANGE_RE.match(page_range):
+                raise ValueError(f"Invalid page range {self.page_range!r}; expected e.g. 1-5 or 1,3,7-9")
+            object.__setattr__(self, "page_range", page_range)
+
+    def filter_data(self) -> Dict[str, Any]:
+        """impress_pdf_Export FilterData properties; empty for the defaults."""
+        data: Dict[str, Any] = dict(EXPORT_PROFILES[self.profile]) if self.profile is not None else {}
+        if self.page_range is not None:
+            data["PageRange"] = self.page_range
+        return data
+
+    def convert_to(self) -> str:
+        """Argument for soffice --convert-to, with filter options as JSON (LibreOffice 7.4+)."""
+        data = self.filter_data()
+        if not data:
+            return "pdf"
+        typed = {}
+        for name, value in data.items():
+            if isinstance(value, bool):
+                typed[name] = {"type": "boolean", "value": str(value).lower()}
+            elif isinstance(value, int):
+                typed[name] = {"type": "long", "value": str(value)}
+            else:
+                typed[name] = {"type": "string", "value": str(value)}
+        return "pdf:impress_pdf_Export:" + json.dumps(typed, separators=(",", ":"))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def kill_process_group(pid: int) -> None:
+    """SIGKILL a soffice process group, including soffice.bin children of the wrapper script."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        return
+    metrics.incr("soffice_kills")
+
 
 def resolve_libreoffice_path() -> Path:
     """
@@ -38,13 +151,72 @@ def resolve_libreoffice_path() -> Path:
     )
 
 
-def convert_pptx_to_pdf(input_path: Union[str, os.PathLike], output_dir: Union[str, os.PathLike]) -> Path:
+def _build_command(
+    input_paths: List[Path],
+    output_dir: Path,
+    profile_dir: Optional[Union[str, os.PathLike]] = None,
+    options: Optional[ConversionOptions] = None,
+) -> List[str]:
+    libreoffice_path = resolve_libreoffice_path()
+    command = [
+        str(libreoffice_path),
+        "--headless",
+        "--nologo",
+        "--nofirststartwizard",
+        "--nolockcheck",
+        "--norestore",
+    ]
+    if profile_dir is not None:
+        command.append(f"-env:UserInstallation={Path(profile_dir).resolve().as_uri()}")
+    command += [
+        "--convert-to", (options or ConversionOptions()).convert_to(),
+        "--outdir", str(output_dir),
+    ]
+    command += [str(p) for p in input_paths]
+    return command
+
+
+def _run_soffice(command: List[str], timeout: Optional[float]) -> subprocess.CompletedProcess:
+    # Own session, so a timeout can take down the whole process group
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process.pid)
+        process.communicate()
+        metrics.incr("conversion_timeouts")
+        raise ConversionTimeoutError(f"LibreOffice did not finish within {timeout:.1f}s")
+    except BaseException:
+        kill_process_group(process.pid)
+        process.wait()
+        raise
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def convert_pptx_to_pdf(
+    input_path: Union[str, os.PathLike],
+    output_dir: Union[str, os.PathLike],
+    profile_dir: Optional[Union[str, os.PathLike]] = None,
+    timeout: Optional[float] = None,
+    options: Optional[ConversionOptions] = None,
+) -> Path:
     """
     Convert a PPT/PPTX file to PDF using LibreOffice in headless mode.
 
     Args:
         input_path: Path to the input PPT/PPTX file.
         output_dir: Directory where the resulting PDF will be written.
+        profile_dir: Private LibreOffice user profile for this process. Required
+            for running several conversions in parallel; defaults to the
+            shared per-user profile.
+        timeout: Seconds before the soffice process group is killed and
+            ConversionTimeoutError is raised. None waits indefinitely.
+        options: PDF export settings; defaults to the whole deck.
 
     Returns:
         Path to the generated PDF file.
@@ -55,21 +227,11 @@ def convert_pptx_to_pdf(input_path: Union[str, os.PathLike], output_dir: Union[s
     if not output_dir.exists():
         output_dir.mkdir(parents=True, exist_ok=True)
 
-    libreoffice_path = resolve_libreoffice_path()
-    command = [
-        str(libreoffice_path),
-        "--headless",
-        "--nologo",
-        "--nofirststartwizard",
-        "--nolockcheck",
-        "--norestore",
-        "--convert-to", "pdf",
-        "--outdir", str(output_dir),
-        str(input_path),
-    ]
+    command = _build_command([input_path], output_dir, profile_dir, options)
 
     # Run conversion; raise CalledProcessError if it fails
-    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    result = _run_soffice(command, timeout)
+    result.check_returncode()
 
     # LibreOffice writes <stem>.pdf into output_dir
     pdf_path = output_dir / (input_path.stem + '.pdf')
@@ -79,6 +241,41 @@ def convert_pptx_to_pdf(input_path: Union[str, os.PathLike], output_dir: Union[s
     return pdf_path
 
 
+def convert_pptx_batch(
+    input_paths: Sequence[Union[str, os.PathLike]],
+    output_dir: Union[str, os.PathLike],
+    profile_dir: Optional[Union[str, os.PathLike]] = None,
+    timeout: Optional[float] = None,
+    options: Optional[ConversionOptions] = None,
+) -> Dict[Path, Optional[Path]]:
+    """
+    Convert several PPT/PPTX files with a single LibreOffice invocation, all
+    with the same `options`.
+
+    Input stems must be unique, since every PDF lands in `output_dir` as
+    <stem>.pdf.
+
+    Returns:
+        Mapping of each input path to its PDF, or None where LibreOffice
+        produced no output for that file.
+    """
+    input_paths = [Path(p) for p in input_paths]
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    command = _build_command(input_paths, output_dir, profile_dir, options)
+    # LibreOffice keeps going after a bad file, so judge each output on its own
+    result = _run_soffice(command, timeout)
+
+    outputs: Dict[Path, Optional[Path]] = {}
+    for input_path in input_paths:
+        pdf_path = output_dir / (input_path.stem + '.pdf')
+        outputs[input_path] = pdf_path if pdf_path.exists() else None
+    if result.returncode != 0 and not any(outputs.values()):
+        raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+    return outputs
+
+
 if __name__ == '__main__':
     # Example usage guarded for direct execution only. Update paths as needed.
     example_input = '/path/to/input.pptx'
@@ -0,0 +1,125 @@
+import io
+import logging
+import posixpath
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import metrics
+from ooxml import CONTENT_TYPES, copy_entry, entry_info, rels_source_dir, rewrite_content_types, rewrite_rels
+
+try:
+    from PIL import Image
+except ImportError:  # optional; without Pillow images are left as they are
+    Image = None
+
+logger = logging.getLogger("pptx2pdf.media")
+
+# Audio and video parts; the PDF shows at most their poster image, which is a separate part
+AV_EXTENSIONS = {
+    ".mp4", ".m4v", ".mov", ".avi", ".wmv", ".mpg", ".mpeg", ".mkv", ".webm", ".asf", ".swf",
+    ".mp3", ".m4a", ".wav", ".wma", ".aac", ".ogg", ".oga", ".flac", ".mid", ".midi", ".aif", ".aiff",
+}
+_IMAGE_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+
+
+def pillow_available() -> bool:
+    return Image is not None
+
+
+@dataclass
+class MediaReport:
+    dropped_parts: int = 0
+    dropped_bytes: int = 0
+    images_downsampled: int = 0
+    image_bytes_saved: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.dropped_parts or self.images_downsampled)
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _downsample(zin: zipfile.ZipFile, info: zipfile.ZipInfo, max_px: int) -> Optional[bytes]:
+    """Return a smaller encoding of an oversized image, or None to keep the original."""
+    fmt = _IMAGE_FORMATS.get(posixpath.splitext(info.filename)[1].lower())
+    if Image is None or fmt is None:
+        return None
+    with zin.open(info) as f:
+        with Image.open(f) as img:
+            if img.format != fmt or max(img.size) <= max_px:
+                return None
+            if fmt == "JPEG":
+                # Let the decoder scale by powers of two instead of decoding every pixel
+                img.draft(img.mode, (max_px, max_px))
+            img.thumbnail((max_px, max_px))
+            out = io.BytesIO()
+            if fmt == "JPEG":
+                img.save(out, "JPEG", quality=85, optimize=True)
+            else:
+                img.save(out, "PNG", optimize=False)
+    data = out.getvalue()
+    return data if len(data) < info.file_size else None
+
+
+def preprocess_media(
+    src: Union[str, Path],
+    dest: Union[str, Path],
+    drop_av: bool = True,
+    max_image_px: int = 0,
+) -> MediaReport:
+    """
+    Rewrite a PPTX package at `dest` without its heavy media.
+
+    Audio and video parts are removed (with `drop_av`) and the relationships
+    and content types that named them are fixed up; JPEG and PNG images whose
+    longest side exceeds `max_image_px` are re-encoded at that size when
+    Pillow is installed (0 keeps images). The package is rewritten entry by
+    entry, so memory stays bounded by the largest image being resampled.
+    """
+    report = MediaReport()
+    with zipfile.ZipFile(src) as zin:
+        infos = zin.infolist()
+        dropped = set()
+        if drop_av:
+            dropped = {
+                i.filename for i in infos
+                if i.filename.startswith("ppt/media/") and posixpath.splitext(i.filename)[1].lower() in AV_EXTENSIONS
+            }
+        with zipfile.ZipFile(dest, "w", allowZip64=True) as zout:
+            for info in infos:
+                name = info.filename
+                if name in dropped:
+                    report.dropped_parts += 1
+                    report.dropped_bytes += info.file_size
+                    continue
+                out_info = entry_info(info)
+
+                if dropped and name.endswith(".rels"):
+                    zout.writestr(out_info, rewrite_rels(zin.read(info), rels_source_dir(name), dropped))
+                    continue
+                if dropped and name == CONTENT_TYPES:
+                    zout.writestr(out_info, rewrite_content_types(zin.read(info), dropped))
+                    continue
+                if max_image_px and name.startswith("ppt/media/"):
+                    try:
+                        data = _downsample(zin, info, max_image_px)
+                    except Exception as exc:
+                        logger.debug("Keeping %s as is: %s", name, exc)
+                        data = None
+                    if data is not None:
+                        report.images_downsampled += 1
+                        report.image_bytes_saved += info.file_size - len(data)
+                        zout.writestr(out_info, data)
+                        continue
+
+                copy_entry(zin, info, zout, out_info)
+
+    if report.dropped_parts:
+        metrics.incr("media_parts_dropped", report.dropped_parts)
+    if report.images_downsampled:
+        metrics.incr("media_images_downsampled", report.images_downsampled)
+    return report
@@ -0,0 +1,17 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# Process-wide event counters surfaced by GET /stats
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        return dict(sorted(_counters.items()))
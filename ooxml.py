@@ -0,0 +1,114 @@
+import posixpath
+import re
+import shutil
+import zipfile
+from typing import List, Set, Tuple
+
+# Package parts of a PPTX that probe, media and shard agree on
+PRESENTATION = "ppt/presentation.xml"
+PRESENTATION_RELS = "ppt/_rels/presentation.xml.rels"
+CONTENT_TYPES = "[Content_Types].xml"
+
+# An entry of the slide list, <p:sldId id="256" r:id="rId2"/>, or of a
+# section list, <p14:sldId id="256"/>, which carries only the id
+SLIDE_ID_RE = re.compile(rb"<(?:\w+:)?sldId\b[^>]*?(?:/>|>.*?</(?:\w+:)?sldId>)", re.S)
+ID_RE = re.compile(rb'\sid="(\d+)"')
+_RID_RE = re.compile(rb'\s\w+:id="([^"]*)"')
+
+_RELATIONSHIP_RE = re.compile(rb"<Relationship\b[^>]*?/>", re.S)
+_TARGET_RE = re.compile(rb'\bTarget="([^"]*)"')
+_REL_ID_RE = re.compile(rb'<Relationship\b[^>]*?\sId="([^"]*)"[^>]*?\sTarget="([^"]*)"', re.S)
+_OVERRIDE_RE = re.compile(rb'<Override\b[^>]*?PartName="([^"]*)"[^>]*?/>', re.S)
+
+_COPY_CHUNK = 1024 * 1024
+
+
+def slide_ids(presentation_xml: bytes) -> List[Tuple[bytes, bytes]]:
+    """(sldId, relationship id) of the slide list in presentation order; section entries are skipped."""
+    slides = []
+    for match in SLIDE_ID_RE.finditer(presentation_xml):
+        element = match.group(0)
+        slide_id, rid = ID_RE.search(element), _RID_RE.search(element)
+        if slide_id is not None and rid is not None:
+            slides.append((slide_id.group(1), rid.group(1)))
+    return slides
+
+
+def slide_list(zf: zipfile.ZipFile) -> List[Tuple[bytes, str]]:
+    """(sldId, slide part) in presentation order."""
+    rels = {
+        rid: _resolve("ppt", target.decode("utf-8", "replace"))
+        for rid, target in _REL_ID_RE.findall(zf.read(PRESENTATION_RELS))
+    }
+    return [(slide_id, rels[rid]) for slide_id, rid in slide_ids(zf.read(PRESENTATION)) if rid in rels]
+
+
+def rels_source_dir(rels_name: str) -> str:
+    # ppt/slides/_rels/slide1.xml.rels describes ppt/slides/slide1.xml
+    return posixpath.dirname(posixpath.dirname(rels_name))
+
+
+def rels_source_part(rels_name: str) -> str:
+    """Name of the part described by the relationships part `rels_name`."""
+    return posixpath.join(rels_source_dir(rels_name), posixpath.basename(rels_name)[: -len(".rels")])
+
+
+def rels_part(part: str) -> str:
+    """Name of the relationships part describing `part`."""
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+
+def _resolve(source_dir: str, ref: str) -> str:
+    return ref.lstrip("/") if ref.startswith("/") else posixpath.normpath(posixpath.join(source_dir, ref))
+
+
+def rels_targets(data: bytes, source_dir: str) -> List[str]:
+    """Package parts referenced by the internal relationships in `data`."""
+    targets = []
+    for match in _RELATIONSHIP_RE.finditer(data):
+        element = match.group(0)
+        target = _TARGET_RE.search(element)
+        if target is not None and b'TargetMode="External"' not in element:
+            targets.append(_resolve(source_dir, target.group(1).decode("utf-8", "replace")))
+    return targets
+
+
+def rewrite_rels(data: bytes, source_dir: str, dropped: Set[str]) -> bytes:
+    """Point relationships to dropped parts at an external "NULL" target, as PowerPoint does for broken links."""
+    def fix(match: "re.Match[bytes]") -> bytes:
+        element = match.group(0)
+        if b'TargetMode="External"' in element:
+            return element
+        target = _TARGET_RE.search(element)
+        if target is None:
+            return element
+        if _resolve(source_dir, target.group(1).decode("utf-8", "replace")) not in dropped:
+            return element
+        element = element.replace(target.group(0), b'Target="NULL"')
+        return element.replace(b"<Relationship", b'<Relationship TargetMode="External"', 1)
+
+    return _RELATIONSHIP_RE.sub(fix, data)
+
+
+def rewrite_content_types(data: bytes, dropped: Set[str]) -> bytes:
+    """Remove the content-type overrides of dropped parts."""
+    def fix(match: "re.Match[bytes]") -> bytes:
+        part = match.group(1).decode("utf-8", "replace").lstrip("/")
+        return b"" if part in dropped else match.group(0)
+
+    return _OVERRIDE_RE.sub(fix, data)
+
+
+def entry_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """A fresh ZipInfo for rewriting the entry `info` into another package."""
+    out_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    out_info.compress_type = info.compress_type
+    out_info.external_attr = info.external_attr
+    return out_info
+
+
+def copy_entry(zin: zipfile.ZipFile, info: zipfile.ZipInfo, zout: zipfile.ZipFile, out_info: zipfile.ZipInfo) -> None:
+    """Stream the entry `info` unchanged into `zout`."""
+    with zin.open(info) as fin, zout.open(out_info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as fout:
+        shutil.copyfileobj(fin, fout, _COPY_CHUNK)
@@ -0,0 +1,484 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import metrics
+from libreoffice import ConversionOptions, ConversionTimeoutError, kill_process_group, resolve_libreoffice_path
+from profiles import ProfileTemplate
+
+try:
+    # pyuno ships with LibreOffice (e.g. the python3-uno package), not PyPI
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+    PropertyValue = None
+
+logger = logging.getLogger("pptx2pdf.pool")
+
+PROC = Path("/proc")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class PoolExhaustedError(TimeoutError):
+    """No pooled worker became free within the acquire timeout."""
+
+
+def uno_available() -> bool:
+    return uno is not None
+
+
+def _prop(name: str, value) -> "PropertyValue":
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class OfficeWorker:
+    """
+    A single long-lived headless soffice process accepting UNO connections
+    on a private named pipe.
+    """
+
+    def __init__(self, worker_id: int, profile_dir: Path, startup_timeout: float = 60.0):
+        self.worker_id = worker_id
+        self.profile_dir = profile_dir
+        self.startup_timeout = startup_timeout
+        # Pipe names are global to the host, so include the pid to keep
+        # several uvicorn workers from colliding.
+        self.pipe_name = f"pptx2pdf-{os.getpid()}-{worker_id}-{uuid.uuid4().hex[:8]}"
+        self.process: Optional[subprocess.Popen] = None
+        self.desktop = None
+        self.started_at = 0.0
+        self.last_used = 0.0
+        self.conversions = 0
+        self.busy = False
+        # Set once a replacement has been requested; the worker keeps serving
+        # until the replacement is up, then is stopped as soon as it is idle.
+        self.retiring = False
+        self.retired = False
+
+    def start(self) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        command = [
+            str(resolve_libreoffice_path()),
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--nofirststartwizard",
+            "--nolockcheck",
+            "--norestore",
+            f"-env:UserInstallation={self.profile_dir.as_uri()}",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        # New session so the soffice wrapper and soffice.bin can be killed together
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.started_at = time.monotonic()
+
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local_ctx)
+        url = f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+        deadline = self.started_at + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError(f"LibreOffice worker {self.worker_id} exited during startup")
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise TimeoutError(f"LibreOffice worker {self.worker_id} did not accept connections in time")
+                time.sleep(0.25)
+
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+        self.last_used = time.monotonic()
+        logger.info("Started LibreOffice worker %s (pid=%s)", self.worker_id, self.process.pid)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.process is not None:
+            kill_process_group(self.process.pid)
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory of the worker's process group (wrapper plus soffice.bin), Linux only."""
+        if self.process is None or not PROC.is_dir():
+            return None
+        pgid = self.process.pid
+        total = 0
+        for entry in PROC.iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                stat = (entry / "stat").read_text()
+                # Fields after the parenthesized command: state, ppid, pgrp, ...
+                if int(stat[stat.rfind(")") + 2:].split()[2]) != pgid:
+                    continue
+                total += int((entry / "statm").read_text().split()[1]) * PAGE_SIZE
+            except (OSError, ValueError, IndexError):
+                continue
+        return total
+
+    def convert(self, input_path: Path, pdf_path: Path, options: Optional[ConversionOptions] = None) -> Path:
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(input_path)),
+            "_blank",
+            0,
+            (_prop("Hidden", True), _prop("ReadOnly", True)),
+        )
+        if doc is None:
+            raise RuntimeError(f"LibreOffice could not load {input_path.name}")
+        store_args = [_prop("FilterName", "impress_pdf_Export")]
+        filter_data = (options or ConversionOptions()).filter_data()
+        if filter_data:
+            store_args.append(_prop(
+                "FilterData",
+                uno.Any("[]com.sun.star.beans.PropertyValue", tuple(_prop(k, v) for k, v in filter_data.items())),
+            ))
+        try:
+            # uno.invoke, since storeToURL cannot take the typed Any directly
+            uno.invoke(doc, "storeToURL", (uno.systemPathToFileUrl(str(pdf_path)), tuple(store_args)))
+        finally:
+            doc.close(True)
+        self.conversions += 1
+        return pdf_path
+
+    def stop(self) -> None:
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                # The bridge is torn down while terminating; ignore
+                pass
+            self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.kill()
+                self.process.wait()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        logger.info("Stopped LibreOffice worker %s", self.worker_id)
+
+
+class OfficePool:
+    """
+    Thread-safe pool of OfficeWorker instances.
+
+    Keeps at least `min_size` workers warm, grows on demand up to `max_size`
+    and stops surplus workers that stayed idle for `idle_timeout` seconds.
+
+    Workers are recycled after `max_conversions` conversions, above
+    `max_rss_bytes` of resident memory or after `max_age` seconds (0 disables
+    each policy). A replacement is started first and the old worker finishes
+    its current conversion before it is stopped, so capacity never dips.
+    """
+
+    def __init__(
+        self,
+        template: ProfileTemplate,
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        acquire_timeout: float = 120.0,
+        max_conversions: int = 0,
+        max_rss_bytes: int = 0,
+        max_age: float = 0.0,
+        check_interval: float = 30.0,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.template = template
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_conversions = max_conversions
+        self.max_rss_bytes = max_rss_bytes
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._cond = threading.Condition()
+        self._workers: Dict[int, OfficeWorker] = {}
+        # Idle workers, least recently used first
+        self._idle: List[OfficeWorker] = []
+        self._starting = 0
+        self._next_id = 0
+        self._conversions = 0
+        self._recycled = 0
+        self._closed = False
+        self._monitor = threading.Thread(target=self._monitor_loop, name="office-pool-monitor", daemon=True)
+
+    def start(self) -> None:
+        for _ in range(self.min_size):
+            worker = self._spawn()
+            with self._cond:
+                self._workers[worker.worker_id] = worker
+                self._idle.append(worker)
+                self._cond.notify()
+        if self.max_rss_bytes or self.max_age:
+            self._monitor.start()
+
+    def _in_use(self) -> int:
+        # A retired worker still finishing its conversion has handed its seat to its replacement
+        return sum(1 for w in self._workers.values() if not w.retired) + self._starting
+
+    def _recycle_reason(self, worker: OfficeWorker, check_rss: bool = True) -> Optional[str]:
+        if self.max_conversions and worker.conversions >= self.max_conversions:
+            return f"{worker.conversions} conversions"
+        if self.max_age and time.monotonic() - worker.started_at >= self.max_age:
+            return "max age reached"
+        if self.max_rss_bytes and check_rss:
+            rss = worker.rss_bytes()
+            if rss is not None and rss >= self.max_rss_bytes:
+                return f"RSS {rss // (1024 * 1024)} MB"
+        return None
+
+    def _begin_retire(self, worker: OfficeWorker, reason: str) -> None:
+        """Mark `worker` for recycling and start its replacement in the background. Caller holds the lock."""
+        if worker.retiring or self._closed:
+            return
+        worker.retiring = True
+        # The replacement holds a seat while it starts, like any other spawn
+        self._starting += 1
+        logger.info("Recycling LibreOffice worker %s (%s)", worker.worker_id, reason)
+        threading.Thread(
+            target=self._replace,
+            args=(worker,),
+            name=f"office-pool-replace-{worker.worker_id}",
+            daemon=True,
+        ).start()
+
+    def _replace(self, old: OfficeWorker) -> None:
+        try:
+            new = self._spawn()
+        except Exception:
+            logger.exception("Could not start replacement for LibreOffice worker %s", old.worker_id)
+            with self._cond:
+                self._starting -= 1
+                # Keep the old worker in service; the next check tries again
+                old.retiring = False
+                self._cond.notify()
+            return
+        stop_now = False
+        retired = None
+        with self._cond:
+            self._starting -= 1
+            if self._closed:
+                stop_now = True
+            else:
+                self._workers[new.worker_id] = new
+                self._idle.append(new)
+                old.retired = True
+                if old in self._idle:
+                    self._idle.remove(old)
+                    self._workers.pop(old.worker_id, None)
+                    retired = old
+                # Otherwise it is busy and release() stops it once its conversion finishes
+                self._recycled += 1
+                self._cond.notify()
+        metrics.incr("pool_workers_recycled")
+        if stop_now:
+            new.stop()
+        elif retired is not None:
+            retired.stop()
+
+    def _monitor_loop(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            with self._cond:
+                if self._closed:
+                    return
+                candidates = [w for w in self._workers.values() if not w.retiring]
+            # RSS sampling reads /proc; keep it outside the lock
+            for worker in candidates:
+                reason = self._recycle_reason(worker)
+                if reason is not None:
+                    with self._cond:
+                        self._begin_retire(worker, reason)
+
+    def _spawn(self) -> OfficeWorker:
+        with self._cond:
+            worker_id = self._next_id
+            self._next_id += 1
+        profile_dir = self.template.clone(self.template.root / f"{os.getpid()}-worker-{worker_id}")
+        worker = OfficeWorker(worker_id, profile_dir)
+        worker.start()
+        return worker
+
+    def acquire(self, timeout: Optional[float] = None) -> OfficeWorker:
+        """Check out an idle worker, starting a new one if below max_size."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        dead: List[OfficeWorker] = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("LibreOffice pool is shut down")
+                    while self._idle:
+                        # Most recently used first: its caches are warm
+                        worker = self._idle.pop()
+                        if worker.alive():
+                            worker.busy = True
+                            return worker
+                        self._workers.pop(worker.worker_id, None)
+                        dead.append(worker)
+                    if self._in_use() < self.max_size:
+                        self._starting += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError("No LibreOffice worker became available")
+                    self._cond.wait(remaining)
+        finally:
+            for worker in dead:
+                worker.stop()
+
+        try:
+            worker = self._spawn()
+        except Exception:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._starting -= 1
+            worker.busy = True
+            self._workers[worker.worker_id] = worker
+        return worker
+
+    def release(self, worker: OfficeWorker, healthy: bool = True) -> None:
+        retired: List[OfficeWorker] = []
+        # RSS is sampled by the monitor thread; scanning /proc per conversion is too costly
+        reason = self._recycle_reason(worker, check_rss=False) if healthy and not worker.retiring else None
+        with self._cond:
+            worker.busy = False
+            worker.last_used = time.monotonic()
+            if healthy and worker.alive() and not self._closed and not worker.retired:
+                self._idle.append(worker)
+                if reason is not None:
+                    self._begin_retire(worker, reason)
+            else:
+                self._workers.pop(worker.worker_id, None)
+                retired.append(worker)
+            # Shrink towards min_size, oldest idle workers first
+            now = time.monotonic()
+            while (
+                self._idle
+                and len(self._workers) > self.min_size
+                and now - self._idle[0].last_used > self.idle_timeout
+            ):
+                stale = self._idle.pop(0)
+                self._workers.pop(stale.worker_id, None)
+                retired.append(stale)
+            self._cond.notify()
+        for w in retired:
+            w.stop()
+
+    def convert(
+        self,
+        input_path: Union[str, os.PathLike],
+        output_dir: Union[str, os.PathLike],
+        timeout: Optional[float] = None,
+        options: Optional[ConversionOptions] = None,
+    ) -> Path:
+        """
+        Convert a PPT/PPTX on an idle worker; returns <output_dir>/<stem>.pdf.
+
+        A UNO call cannot be interrupted, so on timeout the worker's process
+        group is killed, which fails the call, and the worker is replaced.
+        """
+        input_path = Path(input_path).resolve()
+        output_dir = Path(output_dir).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        pdf_path = output_dir / (input_path.stem + ".pdf")
+
+        worker = self.acquire()
+        timed_out = threading.Event()
+        timer = None
+        if timeout is not None:
+            def expire() -> None:
+                timed_out.set()
+                worker.kill()
+
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+
+        healthy = True
+        try:
+            worker.convert(input_path, pdf_path, options)
+        except Exception:
+            # A deck that fails to load is not the worker's fault; a dead process is
+            healthy = worker.alive()
+            if timed_out.is_set():
+                metrics.incr("conversion_timeouts")
+                raise ConversionTimeoutError(f"LibreOffice did not finish within {timeout:.1f}s") from None
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.release(worker, healthy and not timed_out.is_set())
+
+        with self._cond:
+            self._conversions += 1
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"Expected PDF not found: {pdf_path}")
+        return pdf_path
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            workers = [
+                {
+                    "id": w.worker_id,
+                    "pid": w.pid,
+                    "busy": w.busy,
+                    "conversions": w.conversions,
+                    "age_seconds": round(now - w.started_at, 1),
+                    "retiring": w.retiring,
+                }
+                for w in self._workers.values()
+            ]
+            return {
+                "enabled": True,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": len(self._workers),
+                "idle": len(self._idle),
+                "busy": sum(1 for w in self._workers.values() if w.busy),
+                "starting": self._starting,
+                "conversions": self._conversions,
+                "recycled": self._recycled,
+                "workers": workers,
+            }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            workers = list(self._workers.values())
+            self._workers.clear()
+            self._idle.clear()
+            self._cond.notify_all()
+        for w in workers:
+            w.stop()
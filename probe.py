@@ -0,0 +1,127 @@
+import os
+import re
+import zipfile
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Optional, Union
+
+from ooxml import PRESENTATION, slide_ids
+
+_SLIDE_RE = re.compile(r"^ppt/slides/slide\d+\.xml$")
+_CHART_RE = re.compile(r"^ppt/charts/chart\d+\.xml$")
+_EMBEDDED_FONT_RE = re.compile(rb"<(?:\w+:)?embeddedFont\b")
+# <p:sld show="0"> marks a hidden slide, which PDF export skips by default
+_HIDDEN_SLIDE_RE = re.compile(rb"<(?:\w+:)?sld\b[^>]*?\sshow=\"(?:0|false)\"")
+
+# presentation.xml is a few KB; refuse to inflate anything suspiciously large
+_MAX_PRESENTATION_XML = 4 * 1024 * 1024
+# The root element of a slide part, namespaces included, fits well within this
+_SLIDE_HEAD_BYTES = 4096
+
+
+@dataclass
+class DeckProfile:
+    """
+    Cheap complexity estimate of an uploaded deck.
+
+    `slides` is None when the file is not an OOXML package (legacy .ppt) or
+    could not be read; the cost then falls back to the file size.
+    `hidden_slides` is None when unknown, so callers must not assume that
+    every slide becomes a PDF page.
+    """
+
+    size_bytes: int
+    slides: Optional[int] = None
+    hidden_slides: Optional[int] = None
+    media_files: int = 0
+    media_bytes: int = 0
+    embedded_fonts: int = 0
+    charts: int = 0
+    embeddings: int = 0
+
+    # Relative conversion cost; a short text-only deck is about 1
+    BASE_COST = 1.0
+    COST_PER_SLIDE = 0.05
+    COST_PER_MEDIA_MB = 0.02
+    COST_PER_FONT = 0.5
+    COST_PER_CHART = 0.2
+    COST_PER_EMBEDDING = 0.3
+    COST_PER_MB = 0.1
+
+    def cost(self) -> float:
+        if self.slides is None:
+            return self.BASE_COST + self.COST_PER_MB * self.size_bytes / (1024 * 1024)
+        return (
+            self.BASE_COST
+            + self.COST_PER_SLIDE * self.slides
+            + self.COST_PER_MEDIA_MB * self.media_bytes / (1024 * 1024)
+            + self.COST_PER_FONT * self.embedded_fonts
+            + self.COST_PER_CHART * self.charts
+            + self.COST_PER_EMBEDDING * self.embeddings
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DeckProfile":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+    def header(self, predicted_seconds: Optional[float] = None) -> str:
+        """Value for the X-Deck-Profile response header."""
+        parts = [f"{k}={v}" for k, v in self.as_dict().items() if v is not None]
+        if predicted_seconds is not None:
+            parts.append(f"predicted_seconds={predicted_seconds:.1f}")
+        return "; ".join(parts)
+
+
+def probe_deck(path: Union[str, os.PathLike]) -> DeckProfile:
+    """
+    Profile a deck from the zip central directory and ppt/presentation.xml.
+
+    Only the directory, that one small part and the first few KB of each
+    slide (for its hidden flag) are read; media is measured by its recorded
+    uncompressed size and never inflated. A damaged package
+    yields a profile without `slides` instead of an error.
+    """
+    profile = DeckProfile(size_bytes=os.path.getsize(path))
+    try:
+        with zipfile.ZipFile(path) as zf:
+            slide_parts = 0
+            hidden = 0
+            font_parts = 0
+            presentation: Optional[zipfile.ZipInfo] = None
+            for info in zf.infolist():
+                name = info.filename
+                if name.startswith("ppt/media/"):
+                    profile.media_files += 1
+                    profile.media_bytes += info.file_size
+                elif _SLIDE_RE.match(name):
+                    slide_parts += 1
+                    with zf.open(info) as f:
+                        if _HIDDEN_SLIDE_RE.search(f.read(_SLIDE_HEAD_BYTES)):
+                            hidden += 1
+                elif _CHART_RE.match(name):
+                    profile.charts += 1
+                elif name.startswith("ppt/fonts/"):
+                    font_parts += 1
+                elif name.startswith("ppt/embeddings/"):
+                    profile.embeddings += 1
+                elif name == PRESENTATION:
+                    presentation = info
+
+            slides = slide_parts
+            fonts = font_parts
+            if presentation is not None and presentation.file_size <= _MAX_PRESENTATION_XML:
+                xml = zf.read(presentation)
+                # The slide list is authoritative; orphaned slide parts are not rendered
+                slides = len(slide_ids(xml))
+                fonts = max(fonts, len(_EMBEDDED_FONT_RE.findall(xml)))
+            profile.slides = slides
+            profile.hidden_slides = hidden
+            profile.embedded_fonts = fonts
+    except Exception:
+        # Corrupt members raise zlib.error, unknown compression NotImplementedError
+        # and so on; an unreadable package is profiled by its size alone
+        pass
+    return profile
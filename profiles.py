@@ -0,0 +1,145 @@
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from libreoffice import pid_alive, resolve_libreoffice_path
+
+logger = logging.getLogger("pptx2pdf.profiles")
+
+CLONE_MODES = ("reflink", "hardlink", "copy")
+
+
+class ProfileTemplate:
+    """
+    A LibreOffice user profile initialized once and cloned per conversion slot.
+
+    Each soffice process needs its own `-env:UserInstallation`; sharing one
+    profile makes concurrent processes fight over its lock, and a fresh
+    directory costs a first-start initialization on every use.
+    """
+
+    def __init__(self, root: Union[str, os.PathLike], clone_mode: str = "reflink"):
+        if clone_mode not in CLONE_MODES:
+            raise ValueError(f"clone_mode must be one of {', '.join(CLONE_MODES)}")
+        self.root = Path(root)
+        self.path = self.root / "template"
+        self.clone_mode = clone_mode
+
+    @property
+    def ready(self) -> bool:
+        return (self.path / ".ready").exists()
+
+    def build(self, timeout: float = 120.0) -> Path:
+        """Initialize the template profile unless another process already did."""
+        if self.ready:
+            return self.path
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f"template.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        command = [
+            str(resolve_libreoffice_path()),
+            "--headless",
+            "--nologo",
+            "--nofirststartwizard",
+            "--norestore",
+            "--terminate_after_init",
+            f"-env:UserInstallation={staging.as_uri()}",
+        ]
+        try:
+            staging.mkdir()
+            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+            (staging / ".ready").touch()
+            try:
+                os.rename(staging, self.path)
+            except OSError:
+                # Lost the race against another uvicorn worker; use theirs
+                if not self.ready:
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        logger.info("LibreOffice profile template ready at %s", self.path)
+        return self.path
+
+    def clone(self, dest: Union[str, os.PathLike]) -> Path:
+        """Create `dest` as a copy of the template (an empty profile if there is none)."""
+        dest = Path(dest)
+        shutil.rmtree(dest, ignore_errors=True)
+        if not self.ready:
+            dest.mkdir(parents=True, exist_ok=True)
+            return dest
+
+        if self.clone_mode == "reflink":
+            # Copy-on-write clone on btrfs/XFS; GNU cp falls back to a regular copy elsewhere
+            result = subprocess.run(
+                ["cp", "-a", "--reflink=auto", str(self.path), str(dest)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            if result.returncode == 0:
+                return dest
+            shutil.rmtree(dest, ignore_errors=True)
+            shutil.copytree(self.path, dest, symlinks=True)
+        elif self.clone_mode == "hardlink":
+            # LibreOffice replaces its config files rather than rewriting them,
+            # so shared inodes are not modified through the clone
+            shutil.copytree(self.path, dest, symlinks=True, copy_function=os.link)
+        else:
+            shutil.copytree(self.path, dest, symlinks=True)
+        return dest
+
+    def sweep_stale(self) -> None:
+        """Remove per-process profile clones left behind by processes that are gone."""
+        if not self.root.exists():
+            return
+        for entry in self.root.iterdir():
+            pid_part = entry.name.split("-", 1)[0]
+            if not pid_part.isdigit() or int(pid_part) == os.getpid():
+                continue
+            if not pid_alive(int(pid_part)):
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+class ProfileSlots:
+    """
+    A fixed set of cloned profiles handed out to one soffice process at a time.
+
+    The number of slots bounds how many CLI conversions run in parallel in
+    this process.
+    """
+
+    def __init__(self, template: ProfileTemplate, count: int):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self.template = template
+        self.count = count
+        self._paths: List[Path] = []
+        self._free: "queue.Queue[Path]" = queue.Queue()
+
+    def prepare(self) -> None:
+        for i in range(self.count):
+            path = self.template.clone(self.template.root / f"{os.getpid()}-slot-{i}")
+            self._paths.append(path)
+            self._free.put(path)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[Path]:
+        try:
+            path = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No LibreOffice profile slot became available")
+        try:
+            yield path
+        finally:
+            self._free.put(path)
+
+    def status(self) -> dict:
+        return {"slots": self.count, "free": self._free.qsize()}
+
+    def cleanup(self) -> None:
+        for path in self._paths:
+            shutil.rmtree(path, ignore_errors=True)
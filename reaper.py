@@ -0,0 +1,104 @@
+import logging
+import os
+import re
+import signal
+import threading
+from pathlib import Path
+from typing import Iterator, Tuple, Union
+from urllib.parse import unquote
+
+import metrics
+from libreoffice import kill_process_group, pid_alive
+
+logger = logging.getLogger("pptx2pdf.reaper")
+
+PROC = Path("/proc")
+# Profile clones are named "<owner pid>-slot-N", "<owner pid>-worker-N" or
+# "template.tmp-<owner pid>-..."; see profiles.py
+_OWNER_RE = re.compile(r"^(?:template\.tmp-)?(\d+)-")
+
+
+class SofficeReaper:
+    """
+    Watchdog for LibreOffice processes that outlived their owner.
+
+    A uvicorn worker that crashes or is SIGKILLed mid-conversion leaves its
+    soffice.bin running with nobody to wait for it. Every `interval` seconds
+    the reaper scans /proc for soffice processes whose user profile lives
+    under `profile_root` but whose owning process is gone and kills their
+    process group. soffice children of this process are not reaped here:
+    each belongs to a Popen that waits for it and needs its exit status.
+    """
+
+    def __init__(self, profile_root: Union[str, os.PathLike], interval: float = 30.0):
+        self.profile_root = str(Path(profile_root).resolve())
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="soffice-reaper", daemon=True)
+
+    @staticmethod
+    def supported() -> bool:
+        return PROC.is_dir()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Reaper sweep failed")
+
+    def _soffice_processes(self) -> Iterator[Tuple[int, str]]:
+        """Yield (pid, profile directory name) for our soffice processes."""
+        for entry in PROC.iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                cmdline = (entry / "cmdline").read_bytes().split(b"\0")
+            except OSError:
+                continue
+            if not cmdline or b"soffice" not in cmdline[0]:
+                continue
+            for arg in cmdline:
+                arg = arg.decode("utf-8", "replace")
+                if not arg.startswith("-env:UserInstallation="):
+                    continue
+                profile = arg.split("=", 1)[1]
+                if profile.startswith("file://"):
+                    # A file URL, percent-encoded by Path.as_uri()
+                    profile = unquote(profile[len("file://"):])
+                profile_path = Path(profile)
+                if str(profile_path.parent) == self.profile_root:
+                    yield int(entry.name), profile_path.name
+                break
+
+    def sweep(self) -> None:
+        my_pid = os.getpid()
+        for pid, profile_name in self._soffice_processes():
+            match = _OWNER_RE.match(profile_name)
+            if match is None:
+                continue
+            owner = int(match.group(1))
+            if owner == my_pid or pid_alive(owner):
+                continue
+            logger.warning("Killing orphaned soffice pid=%s (owner %s is gone)", pid, owner)
+            try:
+                pgid = os.getpgid(pid)
+                # Conversions run in their own session; never signal our own group
+                if pgid != os.getpgid(0):
+                    kill_process_group(pgid)
+                else:
+                    os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                continue
+            metrics.incr("soffice_orphans_reaped")
+
+    def status(self) -> dict:
+        return {"enabled": self._thread.is_alive(), "interval_seconds": self.interval}
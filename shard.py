@@ -0,0 +1,145 @@
+import logging
+import re
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import List, Sequence, Set, Tuple, Union
+
+from ooxml import (
+    CONTENT_TYPES,
+    ID_RE,
+    PRESENTATION,
+    SLIDE_ID_RE,
+    copy_entry,
+    entry_info,
+    rels_part,
+    rels_source_dir,
+    rels_source_part,
+    rels_targets,
+    rewrite_content_types,
+    rewrite_rels,
+    slide_list,
+)
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # optional; without pypdf decks are never split
+    PdfWriter = None
+
+logger = logging.getLogger("pptx2pdf.shard")
+
+# Custom shows name slides by relationship and only matter for slide shows
+_CUSTOM_SHOWS_RE = re.compile(rb"<(\w+:|)custShowLst\b.*?</\1custShowLst>|<(?:\w+:)?custShowLst\s*/>", re.S)
+
+
+def pypdf_available() -> bool:
+    return PdfWriter is not None
+
+
+def _reachable(zf: zipfile.ZipFile, names: Set[str], excluded: Set[str]) -> Set[str]:
+    """Parts reachable from the package root without passing through `excluded`."""
+    seen: Set[str] = set()
+    pending = deque([""])
+    while pending:
+        part = pending.popleft()
+        rels = "_rels/.rels" if part == "" else rels_part(part)
+        if rels not in names:
+            continue
+        for target in rels_targets(zf.read(rels), rels_source_dir(rels)):
+            if target in names and target not in excluded and target not in seen:
+                seen.add(target)
+                pending.append(target)
+    return seen
+
+
+def _chunk_presentation(data: bytes, dropped_ids: Set[bytes]) -> bytes:
+    def fix(match: "re.Match[bytes]") -> bytes:
+        slide_id = ID_RE.search(match.group(0))
+        return b"" if slide_id is not None and slide_id.group(1) in dropped_ids else match.group(0)
+
+    return _CUSTOM_SHOWS_RE.sub(b"", SLIDE_ID_RE.sub(fix, data))
+
+
+def _write_chunk(
+    zin: zipfile.ZipFile,
+    slides: List[Tuple[bytes, str]],
+    start: int,
+    end: int,
+    dest: Path,
+) -> None:
+    """Write the deck made of slides[start:end] to `dest`."""
+    infos = zin.infolist()
+    names = {i.filename for i in infos}
+    other = slides[:start] + slides[end:]
+    reachable = _reachable(zin, names, {part for _, part in other})
+    dropped = {
+        name for name in names
+        if name.startswith("ppt/") and not name.endswith(".rels") and name not in reachable and name != PRESENTATION
+    }
+    dropped_ids = {slide_id for slide_id, _ in other}
+
+    with zipfile.ZipFile(dest, "w", allowZip64=True) as zout:
+        for info in infos:
+            name = info.filename
+            if name in dropped:
+                continue
+            if name.endswith(".rels") and name != "_rels/.rels" and rels_source_part(name) in dropped:
+                continue
+            out_info = entry_info(info)
+            if name == PRESENTATION:
+                zout.writestr(out_info, _chunk_presentation(zin.read(info), dropped_ids))
+            elif name.endswith(".rels"):
+                zout.writestr(out_info, rewrite_rels(zin.read(info), rels_source_dir(name), dropped))
+            elif name == CONTENT_TYPES:
+                zout.writestr(out_info, rewrite_content_types(zin.read(info), dropped))
+            else:
+                copy_entry(zin, info, zout, out_info)
+
+
+def split_deck(src: Union[str, Path], dest_dir: Union[str, Path], chunks: int) -> List[Path]:
+    """
+    Split a PPTX into up to `chunks` decks of consecutive slides.
+
+    Every chunk keeps the masters, layouts and theme of the original and only
+    the parts its own slides reach (notes, media, charts); links to slides in
+    other chunks become external "NULL" targets. Chunks are written to
+    `dest_dir` as <stem>-part<N>.pptx, in slide order.
+    """
+    src, dest_dir = Path(src), Path(dest_dir)
+    outputs = []
+    with zipfile.ZipFile(src) as zin:
+        slides = slide_list(zin)
+        chunks = max(1, min(chunks, len(slides)))
+        size, extra = divmod(len(slides), chunks)
+        start = 0
+        for index in range(chunks):
+            end = start + size + (1 if index < extra else 0)
+            dest = dest_dir / f"{src.stem}-part{index + 1}.pptx"
+            _write_chunk(zin, slides, start, end, dest)
+            outputs.append(dest)
+            start = end
+    return outputs
+
+
+def extract_slides(src: Union[str, Path], dest: Union[str, Path], count: int) -> int:
+    """Write a PPTX of the first `count` slides of `src` to `dest`; returns the slides written."""
+    with zipfile.ZipFile(src) as zin:
+        slides = slide_list(zin)
+        count = max(0, min(count, len(slides)))
+        _write_chunk(zin, slides, 0, count, Path(dest))
+    return count
+
+
+def merge_pdfs(paths: Sequence[Union[str, Path]], dest: Union[str, Path]) -> Path:
+    """Concatenate PDFs in order into `dest`."""
+    if PdfWriter is None:
+        raise RuntimeError("Merging PDFs requires pypdf")
+    writer = PdfWriter()
+    try:
+        for path in paths:
+            writer.append(str(path))
+        with open(dest, "wb") as f:
+            writer.write(f)
+    finally:
+        writer.close()
+    return Path(dest)
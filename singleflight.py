@@ -0,0 +1,164 @@
+import asyncio
+import errno
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+import metrics
+from cache import link_or_copy
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# Set by a leader that was cancelled; followers then retry and one takes over
+_RETRY = object()
+
+
+def _unlink_results(results: Dict[Path, Union[Path, BaseException]]) -> None:
+    for outcome in results.values():
+        if isinstance(outcome, Path):
+            outcome.unlink(missing_ok=True)
+
+
+class _Flight:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.future = loop.create_future()
+        self.waiters: List[Path] = []
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent work on the same key.
+
+    The first caller for a key (the leader) runs `produce`; callers arriving
+    while it is in flight wait for its result instead of repeating the work.
+    Each caller names its own destination path and receives a private
+    hardlink of the leader's output there, so callers can clean up
+    independently.
+
+    `host_lock` additionally serializes a key across processes on one host
+    with a lock file, for callers that re-check a shared cache once they hold
+    it.
+    """
+
+    def __init__(self, name: str, lock_dir: Optional[Union[str, os.PathLike]] = None, poll_interval: float = 0.05):
+        self.name = name
+        self.lock_dir = Path(lock_dir) if lock_dir is not None else None
+        if self.lock_dir is not None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self._flights: Dict[str, _Flight] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    async def run(self, key: str, dest: Path, produce: Callable[[], Awaitable[Path]]) -> Path:
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, dest, produce)
+            flight.waiters.append(dest)
+            self._followers += 1
+            metrics.incr(f"{self.name}_coalesced")
+            try:
+                results = await asyncio.shield(flight.future)
+            except asyncio.CancelledError:
+                if flight.future.done() and not flight.future.cancelled() and flight.future.exception() is None:
+                    outcome = flight.future.result()
+                    if outcome is not _RETRY and isinstance(outcome.get(dest), Path):
+                        outcome[dest].unlink(missing_ok=True)
+                elif dest in flight.waiters:
+                    flight.waiters.remove(dest)
+                raise
+            if results is _RETRY:
+                continue
+            outcome = results[dest]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+    async def _lead(self, key: str, dest: Path, produce: Callable[[], Awaitable[Path]]) -> Path:
+        flight = _Flight(asyncio.get_running_loop())
+        self._flights[key] = flight
+        self._leaders += 1
+        try:
+            path = await produce()
+        except asyncio.CancelledError:
+            del self._flights[key]
+            flight.future.set_result(_RETRY)
+            raise
+        except BaseException as exc:
+            del self._flights[key]
+            flight.future.set_exception(exc)
+            # Mark as retrieved so a flight without followers does not log a warning
+            flight.future.exception()
+            raise
+
+        # Hand out private copies before anyone (including us) can clean up
+        # `path`. Copies across filesystems can take a while, so they run off
+        # the event loop, and followers may join or leave in the meantime.
+        results: Dict[Path, Union[Path, BaseException]] = {}
+        try:
+            while True:
+                pending = [d for d in flight.waiters if d not in results]
+                if not pending:
+                    break
+                for waiter_dest in pending:
+                    try:
+                        await asyncio.to_thread(link_or_copy, path, waiter_dest)
+                        results[waiter_dest] = waiter_dest
+                    except OSError as exc:
+                        results[waiter_dest] = exc
+        except asyncio.CancelledError:
+            del self._flights[key]
+            _unlink_results(results)
+            flight.future.set_result(_RETRY)
+            raise
+        _unlink_results({d: r for d, r in results.items() if d not in flight.waiters})
+        del self._flights[key]
+        flight.future.set_result(results)
+        return path
+
+    @asynccontextmanager
+    async def host_lock(self, key: str) -> AsyncIterator[None]:
+        """Hold an exclusive per-key lock file shared by all processes using `lock_dir`."""
+        if self.lock_dir is None or fcntl is None:
+            yield
+            return
+        path = self.lock_dir / f"{key}.lock"
+        while True:
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as exc:
+                os.close(fd)
+                if exc.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+                # Poll instead of blocking so no thread is held while we wait
+                await asyncio.sleep(self.poll_interval)
+                continue
+            # The previous holder may have unlinked the file after we opened it
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                os.close(fd)
+                continue
+            if current.st_ino != os.fstat(fd).st_ino:
+                os.close(fd)
+                continue
+            break
+        try:
+            yield
+        finally:
+            path.unlink(missing_ok=True)
+            os.close(fd)
+
+    def status(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self._leaders,
+            "coalesced": self._followers,
+            "host_lock": self.lock_dir is not None and fcntl is not None,
+        }
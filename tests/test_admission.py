@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, QueueFullError
+
+
+async def _hold(controller, cost, release, order, name):
+    async with controller.slot(cost):
+        order.append(name)
+        await release.wait()
+
+
+def test_cheapest_waiter_runs_first():
+    async def main():
+        controller = AdmissionController(1, 10, initial_duration=1.0)
+        release = asyncio.Event()
+        order = []
+        first = asyncio.create_task(_hold(controller, 1.0, release, order, "first"))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(_hold(controller, cost, release, order, name))
+            for name, cost in (("expensive", 50.0), ("cheap", 0.5), ("medium", 5.0))
+        ]
+        await asyncio.sleep(0.01)
+        assert controller.status()["queued"] == 3
+        release.set()
+        await asyncio.gather(first, *waiters)
+        assert order == ["first", "cheap", "medium", "expensive"]
+        assert controller.status()["active"] == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_retry_hint():
+    async def main():
+        controller = AdmissionController(1, 1, initial_duration=2.0)
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(_hold(controller, 1.0, release, order, i)) for i in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(QueueFullError) as exc_info:
+            async with controller.slot():
+                pass
+        assert exc_info.value.retry_after >= 1
+        assert controller.status()["rejected"] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+def test_queue_timeout():
+    async def main():
+        controller = AdmissionController(1, 5, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, 1.0, release, [], "holder"))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            async with controller.slot():
+                pass
+        assert controller.status()["timed_out"] == 1
+        assert controller.queued == 0
+        release.set()
+        await holder
+        # The timed-out waiter did not keep a slot
+        async with controller.slot() as waited:
+            assert waited == 0.0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    async def main():
+        controller = AdmissionController(1, 5)
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(_hold(controller, 1.0, release, order, "holder"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(_hold(controller, 1.0, release, order, "cancelled"))
+        after = asyncio.create_task(_hold(controller, 2.0, release, order, "after"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(holder, after)
+        assert order == ["holder", "after"]
+        assert controller.status()["active"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+import app  # noqa: E402
+from libreoffice import ConversionOptions  # noqa: E402
+
+
+def test_conversion_cache_keys_are_separate():
+    full = app._conversion_cache_key("hash", ConversionOptions())
+    ranged = app._conversion_cache_key("hash", ConversionOptions(page_range="1-5"))
+    preview = app._conversion_cache_key("hash", ConversionOptions(page_range="1-5"), preview=True)
+    draft = app._conversion_cache_key("hash", ConversionOptions(profile="draft"))
+    other = app._conversion_cache_key("other", ConversionOptions())
+    assert len({full, ranged, preview, draft, other}) == 5
+    assert ranged == app._conversion_cache_key("hash", ConversionOptions(page_range="1-5"))
+
+
+def test_parser_field_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(app, "PARSER_FIELD_CACHE_SIZE", 2)
+    monkeypatch.setattr(app, "_parser_fields", app.OrderedDict())
+    app._remember_parser_field("http://a", "files")
+    app._remember_parser_field("http://b", "file")
+    assert app._known_parser_field("http://a") == "files"
+    app._remember_parser_field("http://c", "files")
+    # b was used least recently
+    assert list(app._parser_fields) == ["http://a", "http://c"]
+    assert app._known_parser_field("http://b") is None
+
+
+class _Manager:
+    async def update(self, job, **changes):
+        for key, value in changes.items():
+            setattr(job, key, value)
+
+
+def test_preview_converts_alongside_the_whole_deck(monkeypatch, tmp_path):
+    import asyncio
+
+    from jobs import Job
+    from probe import DeckProfile
+
+    upload = tmp_path / "deck.pptx"
+    upload.write_bytes(b"deck")
+    monkeypatch.setattr(app, "job_manager", _Manager())
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(app, "JOBS_DIR", tmp_path)
+    monkeypatch.setattr(app, "extract_slides", lambda src, dest, count: count)
+
+    async def probe(path):
+        return DeckProfile(size_bytes=1, slides=3)
+
+    monkeypatch.setattr(app, "_probe_upload", probe)
+    calls = []
+
+    async def convert(input_path, job, deck, options, preview=False):
+        calls.append((preview, options))
+        if preview:
+            out = tmp_path / "preview.pdf"
+        else:
+            # The whole deck is already converting while the preview runs
+            while job.preview_path is None:
+                await asyncio.sleep(0.01)
+            out = tmp_path / "full.pdf"
+        out.write_bytes(b"%PDF")
+        return out
+
+    monkeypatch.setattr(app, "_run_job_conversion", convert)
+    job = Job(
+        id="job", kind="pdf", filename="deck.pptx", input_path=str(upload), content_hash="hash",
+        options={"preview_slides": 2},
+    )
+    asyncio.run(asyncio.wait_for(app._run_job(job), 5))
+    assert job.preview_slides == 2
+    assert job.result_path == str(tmp_path / "job.pdf")
+    # The preview deck is converted with the job's own options, without a page range
+    assert {preview for preview, _ in calls} == {True, False}
+    assert all(options.page_range is None for _, options in calls)
+
+
+def _parser(monkeypatch, tmp_path, answer):
+    """Point the parser client at `answer(field name) -> (status, body)`; returns the field names posted."""
+    import httpx
+
+    posted = []
+
+    def handler(request):
+        body = request.read()
+        field = "files" if b'name="files"' in body else "file"
+        posted.append(field)
+        status, content = answer(field)
+        return httpx.Response(status, content=content, headers={"content-type": "application/json"})
+
+    monkeypatch.setattr(app, "parser_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(app, "_parser_fields", app.OrderedDict())
+    pdf = tmp_path / "deck.pdf"
+    pdf.write_bytes(b"%PDF-1.7")
+    return pdf, posted
+
+
+def _call(pdf, url="http://parser/file_parse"):
+    import asyncio
+
+    async def main():
+        reply = await app._call_parser(pdf, "deck.pdf", url, {"backend": "pipeline"}, {})
+        return reply.status_code, await reply.read()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("mismatch", [415, 422])
+def test_parser_field_fallback_is_remembered(monkeypatch, tmp_path, mismatch):
+    pdf, posted = _parser(monkeypatch, tmp_path, lambda field: (200, b"{}") if field == "file" else (mismatch, b"{}"))
+    assert _call(pdf) == (200, b"{}")
+    assert posted == ["files", "file"]
+    assert app._known_parser_field("http://parser/file_parse") == "file"
+
+    # Later requests upload once, with the field that worked
+    assert _call(pdf) == (200, b"{}")
+    assert posted == ["files", "file", "file"]
+
+
+def test_parser_400_is_returned_unchanged(monkeypatch, tmp_path):
+    pdf, posted = _parser(monkeypatch, tmp_path, lambda field: (400, b'{"detail": "bad lang_list"}'))
+    assert _call(pdf) == (400, b'{"detail": "bad lang_list"}')
+    assert posted == ["files"]
+    assert app._known_parser_field("http://parser/file_parse") is None
+
+
+def test_parser_5xx_is_not_uploaded_again(monkeypatch, tmp_path):
+    pdf, posted = _parser(monkeypatch, tmp_path, lambda field: (500, b'{"detail": "crashed"}'))
+    assert _call(pdf) == (500, b'{"detail": "crashed"}')
+    assert posted == ["files"]
+
+
+def test_remembered_field_keeps_working_after_an_error(monkeypatch, tmp_path):
+    statuses = {"files": 422, "file": 200}
+    pdf, posted = _parser(monkeypatch, tmp_path, lambda field: (statuses[field], b"{}"))
+    _call(pdf)
+    statuses["file"] = 400
+    assert _call(pdf)[0] == 400
+    assert posted == ["files", "file", "file"]
+    assert app._known_parser_field("http://parser/file_parse") == "file"
+
+
+def _lanes(monkeypatch, fast, heavy):
+    from admission import AdmissionController
+
+    monkeypatch.setattr(app, "admission", AdmissionController(fast, 10))
+    monkeypatch.setattr(app, "heavy_admission", AdmissionController(heavy, 10) if heavy else None)
+
+
+@pytest.mark.parametrize(
+    "capacity, batch_size, fast, heavy, expected",
+    [
+        (4, 1, 8, 8, (1, 3)),
+        (4, 1, 8, 1, (3, 1)),
+        (4, 2, 8, 1, (6, 1)),
+        (4, 1, 2, 1, (2, 1)),
+        # One instance cannot serve two lanes
+        (1, 1, 8, 2, (1, None)),
+        (1, 4, 8, 0, (4, None)),
+    ],
+)
+def test_lane_concurrency_fits_the_instances(monkeypatch, capacity, batch_size, fast, heavy, expected):
+    _lanes(monkeypatch, fast, heavy)
+    app._cap_lane_concurrency(capacity, batch_size)
+    heavy_limit = app.heavy_admission.max_concurrency if app.heavy_admission is not None else None
+    assert (app.admission.max_concurrency, heavy_limit) == expected
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import batching
+from batching import BatchConverter
+from libreoffice import ConversionOptions
+from profiles import ProfileSlots, ProfileTemplate
+
+
+def _fake_soffice(runs):
+    def convert(input_paths, output_dir, profile_dir=None, timeout=None, options=None):
+        runs.append([Path(p).name for p in input_paths])
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        outputs = {}
+        for path in input_paths:
+            pdf = Path(output_dir) / f"{Path(path).stem}.pdf"
+            pdf.write_bytes(b"%PDF")
+            outputs[Path(path)] = pdf
+        return outputs
+
+    return convert
+
+
+def _converter(tmp_path, slots, max_size):
+    profile_slots = ProfileSlots(ProfileTemplate(tmp_path / "profiles"), slots)
+    profile_slots.prepare()
+    return BatchConverter(tmp_path / "out", profile_slots, window=0.2, max_size=max_size)
+
+
+def test_window_is_spread_over_profile_slots(tmp_path, monkeypatch):
+    runs = []
+    monkeypatch.setattr(batching, "convert_pptx_batch", _fake_soffice(runs))
+    converter = _converter(tmp_path, slots=2, max_size=8)
+    converter.start()
+    try:
+        futures = [converter.submit(tmp_path / f"deck{i}.pptx") for i in range(5)]
+        results = [f.result(timeout=5) for f in futures]
+    finally:
+        converter.shutdown()
+    assert [p.name for p in results] == [f"deck{i}.pdf" for i in range(5)]
+    assert sorted(len(run) for run in runs) == [2, 3]
+
+
+def test_distinct_options_are_not_batched_together(tmp_path, monkeypatch):
+    runs = []
+    monkeypatch.setattr(batching, "convert_pptx_batch", _fake_soffice(runs))
+    converter = _converter(tmp_path, slots=1, max_size=8)
+    converter.start()
+    try:
+        futures = [
+            converter.submit(tmp_path / "a.pptx"),
+            converter.submit(tmp_path / "b.pptx", options=ConversionOptions(page_range="1-2")),
+            converter.submit(tmp_path / "c.pptx"),
+        ]
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        converter.shutdown()
+    assert sorted(runs) == [["a.pptx", "c.pptx"], ["b.pptx"]]
@@ -0,0 +1,106 @@
+import os
+import time
+
+import pytest
+
+import cache
+from cache import DiskCache
+
+
+def _cache(tmp_path, **kwargs):
+    kwargs.setdefault("max_bytes", 1024 ** 2)
+    kwargs.setdefault("max_entries", 100)
+    return DiskCache(tmp_path / "cache", "test", suffix=".pdf", **kwargs)
+
+
+def _file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def _age(disk, key, used, stored):
+    os.utime(disk.path_for(key), (used, stored))
+
+
+def test_evicts_least_recently_used_when_over_max_bytes(tmp_path):
+    disk = _cache(tmp_path, max_bytes=250)
+    now = time.time()
+    for i, key in enumerate(("aa1", "bb2", "cc3")):
+        disk.put(key, _file(tmp_path, f"{key}.pdf", 100))
+        # Stored oldest first, but bb2 was used last and aa1 in between
+        _age(disk, key, used=now - (100, 10, 50)[i], stored=now - 300 + i)
+    disk.evict()
+    assert disk.get("cc3") is not None
+    assert disk.get("bb2") is not None
+    assert disk.get("aa1") is None
+    assert disk.status()["evictions"] == 1
+
+
+def test_evicts_over_max_entries(tmp_path):
+    disk = _cache(tmp_path, max_entries=2)
+    for key in ("aa1", "bb2", "cc3"):
+        disk.put(key, _file(tmp_path, f"{key}.pdf", 10))
+        _age(disk, key, used=time.time() - {"aa1": 30, "bb2": 20, "cc3": 10}[key], stored=time.time())
+    disk.evict()
+    assert [k for k in ("aa1", "bb2", "cc3") if disk.path_for(k).exists()] == ["bb2", "cc3"]
+
+
+def test_ttl_is_measured_from_the_store_time(tmp_path):
+    disk = _cache(tmp_path, ttl=60)
+    disk.put("aa1", _file(tmp_path, "a.pdf", 10))
+    disk.put("bb2", _file(tmp_path, "b.pdf", 10))
+    now = time.time()
+    # Used a moment ago, but stored too long ago
+    _age(disk, "aa1", used=now, stored=now - 120)
+    _age(disk, "bb2", used=now - 120, stored=now - 30)
+    assert disk.get("aa1") is None
+    assert not disk.path_for("aa1").exists()
+    assert disk.get("bb2") is not None
+
+
+def test_hit_keeps_the_store_time(tmp_path):
+    disk = _cache(tmp_path, ttl=60)
+    disk.put("aa1", _file(tmp_path, "a.pdf", 10))
+    stored = time.time() - 30
+    _age(disk, "aa1", used=stored, stored=stored)
+    assert disk.get("aa1") is not None
+    st = disk.path_for("aa1").stat()
+    assert st.st_mtime == pytest.approx(stored)
+    assert st.st_atime > stored + 20
+
+
+def test_failed_put_leaves_no_entry(tmp_path, monkeypatch):
+    disk = _cache(tmp_path)
+
+    def broken_copy(src, dest):
+        dest.write_bytes(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache, "link_or_copy", broken_copy)
+    with pytest.raises(OSError):
+        disk.put("aa1", _file(tmp_path, "a.pdf", 10))
+    assert disk.get("aa1") is None
+    assert list((tmp_path / "cache" / "tmp").iterdir()) == []
+
+
+def test_put_replaces_an_entry_atomically(tmp_path):
+    disk = _cache(tmp_path)
+    disk.put("aa1", _file(tmp_path, "a.pdf", 10))
+    disk.put("aa1", _file(tmp_path, "b.pdf", 20))
+    assert disk.get("aa1").stat().st_size == 20
+
+
+def test_get_copy_racing_an_eviction(tmp_path, monkeypatch):
+    disk = _cache(tmp_path)
+    disk.put("aa1", _file(tmp_path, "a.pdf", 10))
+    link = cache.link_or_copy
+
+    def evicted_first(src, dest):
+        # Another process evicts the entry between get() and the link
+        src.unlink()
+        link(src, dest)
+
+    monkeypatch.setattr(cache, "link_or_copy", evicted_first)
+    assert disk.get_copy("aa1", tmp_path / "out.pdf") is None
+    assert not (tmp_path / "out.pdf").exists()
@@ -0,0 +1,249 @@
+import asyncio
+
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, Job, JobManager, JobRetryError
+from workqueue import MemoryWorkQueue, SQLiteWorkQueue
+
+
+def _job(tmp_path, manager: JobManager) -> Job:
+    upload = tmp_path / "deck.pptx"
+    upload.write_bytes(b"deck")
+    return Job(id=manager.new_id(), kind="pdf", filename="deck.pptx", input_path=str(upload), content_hash="hash")
+
+
+def test_wait_on_queue_copy_of_local_job(tmp_path):
+    async def main():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def runner(job):
+            started.set()
+            await release.wait()
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        manager = JobManager(runner, queue, workers=1, poll_interval=0.05)
+        await manager.start()
+        try:
+            job = await manager.submit(_job(tmp_path, manager))
+            await asyncio.wait_for(started.wait(), 5)
+
+            # What the HTTP handlers get back once the job left this process's hands
+            copy = await queue.get(job.id)
+            assert copy is not manager._jobs[job.id]
+            assert copy.state == RUNNING
+
+            waiter = asyncio.create_task(manager.wait(copy, timeout=5))
+            await asyncio.sleep(0.1)
+            assert not waiter.done()
+            release.set()
+            done = await asyncio.wait_for(waiter, 1)
+            assert done.state == SUCCEEDED
+        finally:
+            await manager.stop()
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_events_follow_queue_copy_of_local_job(tmp_path):
+    async def main():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def runner(job):
+            started.set()
+            await manager.update(job, stage="converting")
+            await release.wait()
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        manager = JobManager(runner, queue, workers=1, poll_interval=0.05)
+        await manager.start()
+        try:
+            job = await manager.submit(_job(tmp_path, manager))
+            await asyncio.wait_for(started.wait(), 5)
+            copy = await queue.get(job.id)
+
+            stages = []
+            async for event in manager.events(copy, heartbeat=0.05):
+                if event is None:
+                    release.set()
+                    continue
+                stages.append(event.stage)
+            assert stages[0] == "converting"
+            assert stages[-1] == SUCCEEDED
+        finally:
+            await manager.stop()
+            await queue.close()
+
+    asyncio.run(asyncio.wait_for(main(), 10))
+
+
+def test_wait_times_out_while_queued(tmp_path):
+    async def main():
+        async def runner(job):
+            pass
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        # Not started: nothing claims the job
+        manager = JobManager(runner, queue, poll_interval=0.01)
+        try:
+            job = await manager.submit(_job(tmp_path, manager))
+            waited = await manager.wait(job, timeout=0.05)
+            assert waited.state == QUEUED
+        finally:
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_job_of_dead_node_is_recovered(tmp_path):
+    async def main():
+        ran = asyncio.Event()
+
+        async def runner(job):
+            ran.set()
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="survivor")
+        dead = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="dead")
+        manager = JobManager(runner, queue, workers=1, poll_interval=0.05)
+        try:
+            job = _job(tmp_path, manager)
+            await dead.put(job)
+            # A node claimed the job, started it and died without renewing its lease
+            claimed = await dead.claim(lease_timeout=0.05)
+            claimed.state, claimed.attempts = RUNNING, 1
+            assert await dead.save(claimed)
+
+            await manager.start()
+            await asyncio.wait_for(ran.wait(), 5)
+            done = await manager.wait(await manager.get(job.id), timeout=5)
+            assert done.state == SUCCEEDED
+            assert done.attempts == 2
+            assert manager.status()["recovered"] == 1
+        finally:
+            await manager.stop()
+            await queue.close()
+            await dead.close()
+
+    asyncio.run(main())
+
+
+def test_job_gives_up_after_max_attempts(tmp_path):
+    async def main():
+        async def runner(job):
+            raise AssertionError("must not run again")
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        manager = JobManager(runner, queue, workers=1, max_attempts=2, poll_interval=0.05)
+        try:
+            job = _job(tmp_path, manager)
+            job.state, job.attempts = RUNNING, 2
+            await queue.put(job)
+            await manager.start()
+            done = await manager.wait(job, timeout=5)
+            assert done.state == FAILED
+            assert "Gave up" in done.error
+        finally:
+            await manager.stop()
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_retry_requeues_without_counting_an_attempt(tmp_path):
+    async def main():
+        calls = 0
+
+        async def runner(job):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise JobRetryError("busy", delay=0.05)
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        manager = JobManager(runner, queue, workers=1, poll_interval=0.02)
+        await manager.start()
+        try:
+            job = await manager.submit(_job(tmp_path, manager))
+            done = await manager.wait(job, timeout=5)
+            assert done.state == SUCCEEDED
+            assert calls == 2
+            assert done.attempts == 1
+        finally:
+            await manager.stop()
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_restart_does_not_count_as_an_attempt(tmp_path):
+    async def main():
+        started = asyncio.Event()
+        finish = False
+
+        async def runner(job):
+            started.set()
+            if not finish:
+                await asyncio.Event().wait()
+
+        queue = SQLiteWorkQueue(tmp_path / "jobs.sqlite3", owner="node")
+        try:
+            job = None
+            for _ in range(4):
+                manager = JobManager(runner, queue, workers=1, max_attempts=3, poll_interval=0.02)
+                if job is None:
+                    job = await manager.submit(_job(tmp_path, manager))
+                await manager.start()
+                await asyncio.wait_for(started.wait(), 5)
+                started.clear()
+                await manager.stop()
+                stopped = await queue.get(job.id)
+                assert stopped.state == QUEUED
+                assert stopped.attempts == 0
+
+            finish = True
+            manager = JobManager(runner, queue, workers=1, max_attempts=3, poll_interval=0.02)
+            await manager.start()
+            try:
+                done = await manager.wait(job, timeout=5)
+                assert done.state == SUCCEEDED
+                assert done.attempts == 1
+            finally:
+                await manager.stop()
+        finally:
+            await queue.close()
+
+    asyncio.run(main())
+
+
+class _SwallowingQueue(MemoryWorkQueue):
+    """A queue client that loses the first cancellation of a claim."""
+
+    def __init__(self):
+        super().__init__("node")
+        self.claiming = asyncio.Event()
+        self.swallowed = False
+
+    async def claim(self, lease_timeout):
+        self.claiming.set()
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            if self.swallowed:
+                raise
+            self.swallowed = True
+        return None
+
+
+def test_stop_survives_a_lost_cancellation():
+    async def main():
+        async def runner(job):
+            pass
+
+        queue = _SwallowingQueue()
+        manager = JobManager(runner, queue, workers=1, poll_interval=0.02)
+        await manager.start()
+        await asyncio.wait_for(queue.claiming.wait(), 5)
+        await asyncio.wait_for(manager.stop(), 5)
+        assert queue.swallowed
+
+    asyncio.run(main())
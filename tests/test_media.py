@@ -0,0 +1,61 @@
+import zipfile
+
+from media import preprocess_media
+from probe import probe_deck
+
+SLIDE_RELS = (
+    b'<Relationships>'
+    b'<Relationship Id="rId1" Type="video" Target="../media/media1.mp4"/>'
+    b'<Relationship Id="rId2" Type="media" Target="/ppt/media/media1.mp4"/>'
+    b'<Relationship Id="rId3" Type="image" Target="../media/image1.png"/>'
+    b'<Relationship Id="rId4" Type="hyperlink" Target="https://example.com/a.mp4" TargetMode="External"/>'
+    b'</Relationships>'
+)
+
+
+def _deck(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(
+            "[Content_Types].xml",
+            '<Types><Default Extension="png" ContentType="image/png"/>'
+            '<Override PartName="/ppt/slides/slide1.xml" ContentType="slide"/>'
+            '<Override PartName="/ppt/media/media1.mp4" ContentType="video/mp4"/></Types>',
+        )
+        zf.writestr("ppt/presentation.xml", '<p:presentation xmlns:p="p" xmlns:r="r"><p:sldIdLst>'
+                    '<p:sldId id="256" r:id="rId2"/></p:sldIdLst></p:presentation>')
+        zf.writestr("ppt/_rels/presentation.xml.rels",
+                    '<Relationships><Relationship Id="rId2" Type="slide" Target="slides/slide1.xml"/></Relationships>')
+        zf.writestr("ppt/slides/slide1.xml", '<p:sld xmlns:p="p"/>')
+        zf.writestr("ppt/slides/_rels/slide1.xml.rels", SLIDE_RELS)
+        zf.writestr("ppt/media/media1.mp4", b"\0" * 4096)
+        zf.writestr("ppt/media/image1.png", b"poster")
+    return path
+
+
+def test_av_parts_are_dropped(tmp_path):
+    out = tmp_path / "out.pptx"
+    report = preprocess_media(_deck(tmp_path / "deck.pptx"), out)
+    assert (report.dropped_parts, report.dropped_bytes) == (1, 4096)
+    assert report.images_downsampled == 0
+
+    with zipfile.ZipFile(out) as zf:
+        assert "ppt/media/media1.mp4" not in zf.namelist()
+        assert zf.read("ppt/media/image1.png") == b"poster"
+        assert b"media1.mp4" not in zf.read("[Content_Types].xml")
+        rels = zf.read("ppt/slides/_rels/slide1.xml.rels")
+    # Relative and absolute links to the video become broken external links
+    assert rels.count(b'TargetMode="External" Id="rId') == 2
+    assert rels.count(b'Target="NULL"') == 2
+    assert b'Target="../media/image1.png"' in rels
+    assert b'Target="https://example.com/a.mp4" TargetMode="External"' in rels
+    assert probe_deck(out).slides == 1
+
+
+def test_av_parts_can_be_kept(tmp_path):
+    deck = _deck(tmp_path / "deck.pptx")
+    out = tmp_path / "out.pptx"
+    report = preprocess_media(deck, out, drop_av=False)
+    assert not report.changed
+    with zipfile.ZipFile(deck) as before, zipfile.ZipFile(out) as after:
+        assert before.namelist() == after.namelist()
+        assert after.read("ppt/slides/_rels/slide1.xml.rels") == SLIDE_RELS
@@ -0,0 +1,68 @@
+import zipfile
+
+from ooxml import slide_ids, slide_list
+from probe import probe_deck
+from shard import extract_slides
+
+PRESENTATION = b"""<?xml version="1.0" encoding="UTF-8"?>
+<p:presentation xmlns:p="p" xmlns:r="r" xmlns:p14="p14">
+<p:sldIdLst><p:sldId id="256" r:id="rId2"/><p:sldId id="257" r:id="rId3"/><p:sldId id="258" r:id="rId4"/></p:sldIdLst>
+<p:extLst><p:ext><p14:sectionLst><p14:section name="A"><p14:sldIdLst>
+<p14:sldId id="256"/><p14:sldId id="257"/><p14:sldId id="258"/>
+</p14:sldIdLst></p14:section></p14:sectionLst></p:ext></p:extLst>
+</p:presentation>"""
+
+
+def _deck(path, slides=3):
+    rels = "".join(
+        f'<Relationship Id="rId{i + 2}" Type="slide" Target="slides/slide{i + 1}.xml"/>' for i in range(slides)
+    )
+    overrides = "".join(f'<Override PartName="/ppt/slides/slide{i + 1}.xml" ContentType="slide"/>' for i in range(slides))
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", f"<Types>{overrides}</Types>")
+        zf.writestr("_rels/.rels", '<Relationships><Relationship Id="rId1" Type="doc" Target="ppt/presentation.xml"/></Relationships>')
+        zf.writestr("ppt/presentation.xml", PRESENTATION)
+        zf.writestr("ppt/_rels/presentation.xml.rels", f"<Relationships>{rels}</Relationships>")
+        for i in range(slides):
+            show = ' show="0"' if i == 1 else ""
+            zf.writestr(f"ppt/slides/slide{i + 1}.xml", f'<p:sld xmlns:p="p"{show}/>')
+    return path
+
+
+def test_section_entries_are_not_slides():
+    assert slide_ids(PRESENTATION) == [(b"256", b"rId2"), (b"257", b"rId3"), (b"258", b"rId4")]
+
+
+def test_probe_and_shard_agree(tmp_path):
+    deck = _deck(tmp_path / "deck.pptx")
+    profile = probe_deck(deck)
+    with zipfile.ZipFile(deck) as zf:
+        slides = slide_list(zf)
+    assert profile.slides == len(slides) == 3
+    assert profile.hidden_slides == 1
+    assert [part for _, part in slides] == [f"ppt/slides/slide{i}.xml" for i in (1, 2, 3)]
+
+
+def test_extract_slides(tmp_path):
+    deck = _deck(tmp_path / "deck.pptx")
+    out = tmp_path / "preview.pptx"
+    assert extract_slides(deck, out, 2) == 2
+    assert probe_deck(out).slides == 2
+    with zipfile.ZipFile(out) as zf:
+        assert "ppt/slides/slide3.xml" not in zf.namelist()
+        assert b"slide3" not in zf.read("[Content_Types].xml")
+        assert b'id="258"' not in zf.read("ppt/presentation.xml")
+
+
+def test_absolute_slide_targets(tmp_path):
+    deck = _deck(tmp_path / "deck.pptx")
+    with zipfile.ZipFile(deck) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+    parts["ppt/_rels/presentation.xml.rels"] = parts["ppt/_rels/presentation.xml.rels"].replace(
+        b'Target="slides/slide2.xml"', b'Target="/ppt/slides/slide2.xml"'
+    )
+    with zipfile.ZipFile(deck, "w") as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+    with zipfile.ZipFile(deck) as zf:
+        assert [part for _, part in slide_list(zf)] == [f"ppt/slides/slide{i}.xml" for i in (1, 2, 3)]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import app  # noqa: E402
+from cache import DiskCache  # noqa: E402
+
+
+@pytest.fixture
+def parser_cache(tmp_path, monkeypatch):
+    disk = DiskCache(tmp_path / "parse", "parse", max_bytes=1024 ** 2, max_entries=100, suffix=".json")
+    monkeypatch.setattr(app, "parser_cache", disk)
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path)
+    return disk
+
+
+def _reply(chunks, status=200):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return app.ParserReply(status, "application/json; charset=utf-8", body())
+
+
+def test_miss_then_hit(parser_cache):
+    async def main():
+        assert await app._cached_parser_reply("key") is None
+        stored = app._cache_parser_reply(_reply([b'{"pages":', b" [1]}"]), "key")
+        assert await stored.read() == b'{"pages": [1]}'
+
+        hit = await app._cached_parser_reply("key")
+        assert hit.status_code == 200
+        assert hit.media_type == "application/json; charset=utf-8"
+        assert await hit.read() == b'{"pages": [1]}'
+
+    asyncio.run(main())
+    assert parser_cache.status()["hits"] == 1
+
+
+def test_errors_and_partial_reads_are_not_cached(parser_cache):
+    async def main():
+        await app._cache_parser_reply(_reply([b'{"error": "busy"}'], status=503), "error").read()
+        assert await app._cached_parser_reply("error") is None
+
+        partial = app._cache_parser_reply(_reply([b'{"a":', b" 1}"]), "partial")
+        stream = partial.body
+        await stream.__anext__()
+        await stream.aclose()
+        assert await app._cached_parser_reply("partial") is None
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("header", [b"not json\n", b'{"status_code": 200}\n', b""])
+def test_corrupt_entry_is_a_miss_and_removed(parser_cache, tmp_path, header):
+    src = tmp_path / "entry"
+    src.write_bytes(header + b'{"pages": []}')
+    path = parser_cache.put("key", src)
+
+    assert asyncio.run(app._cached_parser_reply("key")) is None
+    assert not path.exists()
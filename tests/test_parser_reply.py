@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import httpx  # noqa: E402
+from fastapi import BackgroundTasks, HTTPException  # noqa: E402
+
+import app  # noqa: E402
+
+
+def _reply(body: bytes, status: int = 200) -> "app.ParserReply":
+    async def chunks():
+        yield body
+
+    return app.ParserReply(status, "application/json", chunks())
+
+
+async def _open(body: bytes):
+    def handler(request):
+        return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        resp = await client.send(client.build_request("GET", "http://parser/"), stream=True)
+        stream = await app._open_parser_body(resp)
+        return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.parametrize("body", [b'{"ok": true}', b'  \n[1, 2]', b"null", b"-1.5"])
+def test_json_bodies_pass_through_unchanged(body):
+    assert asyncio.run(_open(body)) == body
+
+
+@pytest.mark.parametrize("body", [b"<html>Bad gateway</html>", b"Internal Server Error", b""])
+def test_non_json_bodies_are_rejected(body):
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(_open(body))
+    assert exc_info.value.status_code == 502
+
+
+def test_reencoding_fallback(monkeypatch):
+    monkeypatch.setattr(app, "PARSER_PASSTHROUGH", False)
+
+    async def main():
+        response = await app._parser_response(_reply(b'{"pages": [1, 2]}', 207), {"X-Test": "1"}, BackgroundTasks())
+        assert response.status_code == 207
+        assert json.loads(response.body) == {"pages": [1, 2]}
+        assert response.headers["x-test"] == "1"
+
+    asyncio.run(main())
+
+
+def test_reencoding_failure_still_cleans_up(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "PARSER_PASSTHROUGH", False)
+    leftovers = [tmp_path / "deck.pptx", tmp_path / "deck.pdf"]
+    for path in leftovers:
+        path.write_bytes(b"x")
+
+    async def main():
+        background = BackgroundTasks()
+        background.add_task(app._cleanup_paths, *leftovers)
+        with pytest.raises(HTTPException) as exc_info:
+            await app._parser_response(_reply(b"not json"), {}, background)
+        assert exc_info.value.status_code == 502
+
+    asyncio.run(main())
+    assert not any(path.exists() for path in leftovers)
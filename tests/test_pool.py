@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+import pool
+from pool import OfficePool, PoolExhaustedError
+
+
+class FakeWorker:
+    # Workers with an id in `blocked` wait for `gate` while starting
+    gate = threading.Event()
+    blocked = set()
+    rss = {}
+
+    def __init__(self, worker_id, profile_dir, startup_timeout=60.0):
+        self.worker_id = worker_id
+        self.started_at = self.last_used = 0.0
+        self.conversions = 0
+        self.busy = self.retiring = self.retired = False
+        self.stopped = False
+
+    @property
+    def pid(self):
+        return 1000 + self.worker_id
+
+    def start(self):
+        if self.worker_id in self.blocked:
+            self.gate.wait(5)
+        self.started_at = self.last_used = time.monotonic()
+
+    def alive(self):
+        return not self.stopped
+
+    def rss_bytes(self):
+        return self.rss.get(self.worker_id, 0)
+
+    def convert(self, input_path, pdf_path, options=None):
+        pdf_path.write_bytes(b"%PDF")
+        self.conversions += 1
+        return pdf_path
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeTemplate:
+    def __init__(self, root):
+        self.root = root
+
+    def clone(self, dest):
+        return dest
+
+
+@pytest.fixture
+def make_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(pool, "OfficeWorker", FakeWorker)
+    monkeypatch.setattr(FakeWorker, "gate", threading.Event())
+    monkeypatch.setattr(FakeWorker, "blocked", set())
+    monkeypatch.setattr(FakeWorker, "rss", {})
+    pools = []
+
+    def make(**kwargs):
+        p = OfficePool(FakeTemplate(tmp_path), **kwargs)
+        p.start()
+        pools.append(p)
+        return p
+
+    yield make
+    FakeWorker.gate.set()
+    for p in pools:
+        p.shutdown()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _worker_ids(p):
+    return sorted(w["id"] for w in p.status()["workers"])
+
+
+def test_recycled_after_max_conversions(make_pool, tmp_path):
+    p = make_pool(min_size=1, max_size=1, max_conversions=2)
+    first = p._workers[0]
+    deck = tmp_path / "deck.pptx"
+    deck.write_bytes(b"deck")
+
+    p.convert(deck, tmp_path / "out")
+    assert p.status()["recycled"] == 0
+    p.convert(deck, tmp_path / "out")
+    _wait_for(lambda: p.status()["recycled"] == 1)
+    assert first.stopped
+    assert _worker_ids(p) == [1]
+    assert p.status()["starting"] == 0
+
+
+def test_recycled_after_max_age(make_pool):
+    p = make_pool(min_size=1, max_size=1, max_age=0.05, check_interval=0.01)
+    first = p._workers[0]
+    _wait_for(lambda: first.stopped)
+    assert p.status()["recycled"] >= 1
+    assert 0 not in _worker_ids(p)
+
+
+def test_recycled_above_max_rss(make_pool):
+    FakeWorker.rss[0] = 600 * 1024 * 1024
+    p = make_pool(min_size=2, max_size=2, max_rss_bytes=512 * 1024 * 1024, check_interval=0.01)
+    _wait_for(lambda: p.status()["recycled"] == 1)
+    time.sleep(0.05)
+    assert p.status()["recycled"] == 1
+    assert _worker_ids(p) == [1, 2]
+
+
+def test_replacement_holds_a_seat_while_starting(make_pool, tmp_path):
+    FakeWorker.blocked.add(1)
+    p = make_pool(min_size=1, max_size=2, max_conversions=1)
+    deck = tmp_path / "deck.pptx"
+    deck.write_bytes(b"deck")
+    p.convert(deck, tmp_path / "out")
+    assert p.status()["starting"] == 1
+
+    # The old worker keeps serving, but no third soffice is started next to it and its replacement
+    worker = p.acquire()
+    assert worker.worker_id == 0
+    with pytest.raises(PoolExhaustedError):
+        p.acquire(timeout=0.05)
+
+    FakeWorker.gate.set()
+    _wait_for(lambda: p.status()["starting"] == 0)
+    p.release(worker)
+    assert _worker_ids(p) == [1]
+    assert p.status()["recycled"] == 1
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+import reaper
+from reaper import SofficeReaper
+
+DEAD_OWNER = 999999
+
+
+@pytest.fixture
+def proc(monkeypatch, tmp_path):
+    """A fake /proc; returns add(pid, *args) and the process groups killed."""
+    root = tmp_path / "proc"
+    root.mkdir()
+    killed = []
+    monkeypatch.setattr(reaper, "PROC", root)
+    monkeypatch.setattr(reaper, "pid_alive", lambda pid: pid != DEAD_OWNER)
+    monkeypatch.setattr(reaper, "kill_process_group", killed.append)
+    monkeypatch.setattr(reaper.os, "getpgid", lambda pid: -1 if pid == 0 else pid)
+
+    def add(pid, *args):
+        (root / str(pid)).mkdir()
+        (root / str(pid) / "cmdline").write_bytes(b"\0".join(a.encode() for a in args) + b"\0")
+
+    (root / "self").mkdir()
+    return add, killed
+
+
+def _profile(root, name):
+    return f"-env:UserInstallation={(root / name).as_uri()}"
+
+
+def test_orphans_are_killed(proc, tmp_path):
+    add, killed = proc
+    # Path.as_uri() percent-encodes the space
+    root = tmp_path / "data dir" / "profiles"
+    root.mkdir(parents=True)
+    soffice = "/usr/lib/libreoffice/program/soffice.bin"
+    add(100, soffice, "--headless", _profile(root, f"{DEAD_OWNER}-slot-0"))
+    add(101, soffice, _profile(root, f"template.tmp-{DEAD_OWNER}-abc"))
+    add(102, soffice, _profile(root, "1-worker-0"))
+    add(103, soffice, _profile(root, f"{os.getpid()}-slot-1"))
+    add(104, soffice, _profile(tmp_path / "elsewhere", f"{DEAD_OWNER}-slot-0"))
+    add(105, "/usr/bin/python3", _profile(root, f"{DEAD_OWNER}-slot-0"))
+    add(106, soffice, _profile(root, "template"))
+
+    SofficeReaper(root).sweep()
+    assert sorted(killed) == [100, 101]
+
+
+def test_processes_are_matched_by_profile_root(proc, tmp_path):
+    add, _ = proc
+    root = tmp_path / "100% profiles"
+    root.mkdir()
+    add(100, "soffice", "--headless", _profile(root, "7-slot-0"))
+    assert list(SofficeReaper(root)._soffice_processes()) == [(100, "7-slot-0")]
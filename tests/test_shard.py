@@ -0,0 +1,97 @@
+import zipfile
+
+import pytest
+
+from probe import probe_deck
+from shard import merge_pdfs, split_deck
+
+SHARED = ["ppt/slideMasters/slideMaster1.xml", "ppt/slideLayouts/slideLayout1.xml", "ppt/theme/theme1.xml"]
+
+
+def _rels(*targets):
+    items = "".join(f'<Relationship Id="rId{i + 1}" Type="t" Target="{t}"/>' for i, t in enumerate(targets))
+    return f"<Relationships>{items}</Relationships>"
+
+
+def _deck(path, slides=4):
+    ids = "".join(f'<p:sldId id="{256 + i}" r:id="rId{i + 3}"/>' for i in range(slides))
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", "<Types>" + "".join(
+            f'<Override PartName="/ppt/slides/slide{i + 1}.xml" ContentType="slide"/>' for i in range(slides)
+        ) + "</Types>")
+        zf.writestr("_rels/.rels", _rels("ppt/presentation.xml"))
+        zf.writestr("ppt/presentation.xml", f'<p:presentation xmlns:p="p" xmlns:r="r"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        zf.writestr("ppt/_rels/presentation.xml.rels", _rels(
+            "slideMasters/slideMaster1.xml", "theme/theme1.xml", *(f"slides/slide{i + 1}.xml" for i in range(slides))
+        ))
+        zf.writestr("ppt/slideMasters/slideMaster1.xml", "<p:sldMaster/>")
+        zf.writestr("ppt/slideMasters/_rels/slideMaster1.xml.rels", _rels("../slideLayouts/slideLayout1.xml", "../theme/theme1.xml"))
+        zf.writestr("ppt/slideLayouts/slideLayout1.xml", "<p:sldLayout/>")
+        zf.writestr("ppt/slideLayouts/_rels/slideLayout1.xml.rels", _rels("../slideMasters/slideMaster1.xml"))
+        zf.writestr("ppt/theme/theme1.xml", "<a:theme/>")
+        zf.writestr("ppt/media/image1.png", b"png")
+        for i in range(slides):
+            zf.writestr(f"ppt/slides/slide{i + 1}.xml", '<p:sld xmlns:p="p"/>')
+        # The first slide links to the last one, the second shows an image
+        zf.writestr("ppt/slides/_rels/slide1.xml.rels", _rels("../slideLayouts/slideLayout1.xml", f"slide{slides}.xml"))
+        zf.writestr("ppt/slides/_rels/slide2.xml.rels", _rels("../slideLayouts/slideLayout1.xml", "../media/image1.png"))
+        for i in range(2, slides):
+            zf.writestr(f"ppt/slides/_rels/slide{i + 1}.xml.rels", _rels("../slideLayouts/slideLayout1.xml"))
+    return path
+
+
+def test_split_deck(tmp_path):
+    first, second = split_deck(_deck(tmp_path / "deck.pptx"), tmp_path, 2)
+    assert [first.name, second.name] == ["deck-part1.pptx", "deck-part2.pptx"]
+    assert probe_deck(first).slides == probe_deck(second).slides == 2
+
+    with zipfile.ZipFile(first) as zf:
+        names = set(zf.namelist())
+        assert set(SHARED) <= names
+        assert {"ppt/slides/slide1.xml", "ppt/slides/slide2.xml", "ppt/media/image1.png"} <= names
+        assert not {"ppt/slides/slide3.xml", "ppt/slides/slide4.xml"} & names
+        rels = zf.read("ppt/slides/_rels/slide1.xml.rels")
+        assert b'<Relationship TargetMode="External" Id="rId2" Type="t" Target="NULL"/>' in rels
+        assert b'Target="../slideLayouts/slideLayout1.xml"' in rels
+        assert b"slide4" not in zf.read("[Content_Types].xml")
+
+    with zipfile.ZipFile(second) as zf:
+        names = set(zf.namelist())
+        assert set(SHARED) <= names
+        assert {"ppt/slides/slide3.xml", "ppt/slides/slide4.xml"} <= names
+        # Only the second slide reaches the image
+        assert not {"ppt/slides/slide1.xml", "ppt/slides/slide2.xml", "ppt/media/image1.png"} & names
+        assert b'id="256"' not in zf.read("ppt/presentation.xml")
+
+
+def test_split_deck_never_makes_empty_chunks(tmp_path):
+    chunks = split_deck(_deck(tmp_path / "deck.pptx", slides=3), tmp_path, 8)
+    assert [probe_deck(chunk).slides for chunk in chunks] == [1, 1, 1]
+
+
+def test_merge_keeps_page_order(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+
+    paths = []
+    for width in (100, 200, 300):
+        writer = pypdf.PdfWriter()
+        writer.add_blank_page(width=width, height=100)
+        writer.add_blank_page(width=width + 1, height=100)
+        path = tmp_path / f"{width}.pdf"
+        with open(path, "wb") as f:
+            writer.write(f)
+        paths.append(path)
+
+    merged = merge_pdfs(paths, tmp_path / "merged.pdf")
+    widths = [round(float(page.mediabox.width)) for page in pypdf.PdfReader(merged).pages]
+    assert widths == [100, 101, 200, 201, 300, 301]
+
+
+@pytest.mark.parametrize("prefix", [b"p:", b""])
+def test_custom_shows_are_removed(prefix):
+    from shard import _chunk_presentation
+
+    shows = b"<%scustShowLst><%scustShow name=\"a\" id=\"0\"/></%scustShowLst>" % (prefix, prefix, prefix)
+    data = b'<p:presentation><p:sldIdLst><p:sldId id="256" r:id="rId2"/></p:sldIdLst>%s</p:presentation>' % shows
+    assert _chunk_presentation(data, set()) == b'<p:presentation><p:sldIdLst><p:sldId id="256" r:id="rId2"/></p:sldIdLst></p:presentation>'
+    assert b"custShowLst" not in _chunk_presentation(b"<presentation><%scustShowLst/></presentation>" % prefix, set())
@@ -0,0 +1,75 @@
+import asyncio
+from pathlib import Path
+
+from singleflight import SingleFlight
+
+
+def test_followers_get_private_copies(tmp_path):
+    async def main():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+        calls = 0
+
+        async def produce() -> Path:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            out = tmp_path / "out.pdf"
+            out.write_bytes(b"%PDF")
+            return out
+
+        tasks = [asyncio.create_task(flights.run("key", tmp_path / f"dest-{i}.pdf", produce)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        release.set()
+        leader, *followers = await asyncio.gather(*tasks)
+        assert calls == 1
+        assert leader == tmp_path / "out.pdf"
+        assert followers == [tmp_path / "dest-1.pdf", tmp_path / "dest-2.pdf"]
+        for path in followers:
+            assert path.read_bytes() == b"%PDF"
+        assert flights.status()["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_failure_reaches_followers(tmp_path):
+    async def main():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def produce() -> Path:
+            await release.wait()
+            raise RuntimeError("conversion failed")
+
+        tasks = [asyncio.create_task(flights.run("key", tmp_path / f"dest-{i}.pdf", produce)) for i in range(2)]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_hands_over(tmp_path):
+    async def main():
+        flights = SingleFlight("test")
+        started = asyncio.Event()
+
+        async def stall() -> Path:
+            started.set()
+            await asyncio.Event().wait()
+
+        async def produce() -> Path:
+            out = tmp_path / "out.pdf"
+            out.write_bytes(b"%PDF")
+            return out
+
+        leader = asyncio.create_task(flights.run("key", tmp_path / "dest-0.pdf", stall))
+        await started.wait()
+        follower = asyncio.create_task(flights.run("key", tmp_path / "dest-1.pdf", produce))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        # The follower retries and becomes the leader itself
+        assert await follower == tmp_path / "out.pdf"
+
+    asyncio.run(main())
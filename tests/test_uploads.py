@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+import app  # noqa: E402
+import metrics  # noqa: E402
+
+PPTX = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    from starlette.testclient import TestClient
+
+    uploads, outputs = tmp_path / "uploads", tmp_path / "outputs"
+    uploads.mkdir()
+    outputs.mkdir()
+    monkeypatch.setattr(app, "UPLOAD_DIR", uploads)
+    monkeypatch.setattr(app, "OUTPUT_DIR", outputs)
+    monkeypatch.setattr(app, "_deck_headers", lambda deck: {})
+    converted = []
+
+    async def convert(input_path, content_hash, deck, options, preview=False):
+        converted.append((input_path.read_bytes(), sorted(p.name for p in uploads.iterdir())))
+        out = outputs / f"{input_path.stem}.pdf"
+        out.write_bytes(b"%PDF-1.7 " + bytes(range(256)) * (app.UPLOAD_CHUNK_SIZE // 256 + 1))
+        return out
+
+    monkeypatch.setattr(app, "_run_conversion", convert)
+    # Without the lifespan: no pool, caches or jobs
+    return TestClient(app.app), converted
+
+
+def test_raw_body_is_written_once(client, monkeypatch):
+    client, converted = client
+
+    def spooled(src, dest):
+        raise AssertionError("a raw body must not go through a spooled copy")
+
+    monkeypatch.setattr(app, "_write_upload", spooled)
+    deck = b"PK\x03\x04" + bytes(range(256)) * 4096
+    before = metrics.snapshot().get("uploads_streamed", 0)
+    reply = client.post("/convert?filename=deck.pptx", content=deck, headers={"content-type": PPTX})
+
+    assert reply.status_code == 200
+    assert reply.headers["content-disposition"].endswith('"deck.pdf"')
+    [(received, uploads)] = converted
+    assert received == deck
+    assert len(uploads) == 1
+    assert metrics.snapshot()["uploads_streamed"] == before + 1
+
+
+def test_raw_body_needs_a_filename(client):
+    client, converted = client
+    reply = client.post("/convert", content=b"PK\x03\x04", headers={"content-type": PPTX})
+    assert reply.status_code == 400
+    assert converted == []
+
+
+def _encode_in_memory(boundary, filename, content):
+    # The body /convert_multipart used to build in memory
+    crlf = "\r\n"
+    headers = (
+        f"--{boundary}{crlf}"
+        f"Content-Disposition: form-data; name=\"file\"; filename=\"{filename}\"{crlf}"
+        f"Content-Type: application/pdf{crlf}{crlf}"
+    ).encode("utf-8")
+    return headers + content + f"{crlf}--{boundary}--{crlf}".encode("utf-8")
+
+
+def test_multipart_response_is_streamed_from_disk(client):
+    client, converted = client
+    files = {"file": ("deck.pptx", b"PK\x03\x04", PPTX)}
+    reply = client.post("/convert_multipart", files=files)
+
+    assert reply.status_code == 200
+    media_type, boundary = reply.headers["content-type"].split("; boundary=")
+    assert media_type == "multipart/form-data"
+    pdf = b"%PDF-1.7 " + bytes(range(256)) * (app.UPLOAD_CHUNK_SIZE // 256 + 1)
+    assert reply.content == _encode_in_memory(boundary, "deck.pdf", pdf)
+    assert int(reply.headers["content-length"]) == len(reply.content)
+
+
+def test_multipart_body_is_read_in_chunks(tmp_path):
+    pdf = tmp_path / "deck.pdf"
+    pdf.write_bytes(b"x" * (2 * app.UPLOAD_CHUNK_SIZE + 1))
+    headers, footer, _ = app._build_multipart_envelope("file", "deck.pdf")
+    chunks = list(app._iter_multipart_file(headers, pdf, footer))
+    assert chunks[0] == headers and chunks[-1] == footer
+    assert max(len(chunk) for chunk in chunks) == app.UPLOAD_CHUNK_SIZE
+    assert sum(map(len, chunks)) == len(headers) + pdf.stat().st_size + len(footer)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict
+
+import pytest
+
+import workqueue
+from jobs import FAILED, RUNNING, SUCCEEDED, Job, JobManager
+from workqueue import MemoryWorkQueue, RedisWorkQueue, SQLiteWorkQueue, WorkQueue
+
+
+def _job(job_id: str) -> Job:
+    return Job(id=job_id, kind="pdf", filename="deck.pptx", input_path="/nonexistent", content_hash="hash")
+
+
+def _redis_queues(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    if workqueue.aioredis is None:
+        pytest.skip("redis is not installed")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(workqueue.aioredis, "from_url", lambda url: fakeredis.aioredis.FakeRedis(server=server))
+    return RedisWorkQueue("redis://test", "a"), RedisWorkQueue("redis://test", "b")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def queues(request, tmp_path, monkeypatch):
+    """Two nodes sharing one queue."""
+    if request.param == "memory":
+        a = MemoryWorkQueue("a")
+        b = MemoryWorkQueue("b")
+        # Share the records so both owners see the same leases
+        b._records = a._records
+    elif request.param == "redis":
+        a, b = _redis_queues(monkeypatch)
+    else:
+        a = SQLiteWorkQueue(tmp_path / "jobs.db", "a")
+        b = SQLiteWorkQueue(tmp_path / "jobs.db", "b")
+    yield a, b
+    asyncio.run(a.close())
+    asyncio.run(b.close())
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+
+def test_claim_leases_a_job_to_one_node(queues):
+    a, b = queues
+
+    async def main():
+        await a.put(_job("1"))
+        assert await a.depth() == 1
+        claimed = await a.claim(lease_timeout=60)
+        assert claimed.id == "1"
+        assert await b.claim(lease_timeout=60) is None
+
+    asyncio.run(main())
+
+
+def test_expired_lease_is_recovered_and_fences_the_old_holder(queues):
+    a, b = queues
+
+    async def main():
+        await a.put(_job("1"))
+        job = await a.claim(lease_timeout=0.05)
+        job.state = RUNNING
+        assert await a.save(job)
+        await asyncio.sleep(0.1)
+
+        recovered = await b.claim(lease_timeout=60)
+        assert recovered is not None and recovered.id == "1"
+        assert recovered.state == RUNNING
+        # The node that lost the lease can no longer record progress
+        job.stage = "stale"
+        assert not await a.save(job)
+        recovered.stage = "converting"
+        assert await b.save(recovered)
+        assert (await a.get("1")).stage == "converting"
+
+    asyncio.run(main())
+
+
+def test_extend_keeps_the_lease(queues):
+    a, b = queues
+
+    async def main():
+        await a.put(_job("1"))
+        await a.claim(lease_timeout=0.1)
+        await a.extend(["1"], lease_timeout=60)
+        await asyncio.sleep(0.15)
+        assert await b.claim(lease_timeout=60) is None
+
+    asyncio.run(main())
+
+
+def test_release_with_delay(queues):
+    a, b = queues
+
+    async def main():
+        await a.put(_job("1"))
+        job = await a.claim(lease_timeout=60)
+        await a.release(job, delay=0.1)
+        assert await b.claim(lease_timeout=60) is None
+        await asyncio.sleep(0.15)
+        assert (await b.claim(lease_timeout=60)).id == "1"
+
+    asyncio.run(main())
+
+
+def test_complete_and_expire(queues):
+    a, b = queues
+
+    async def main():
+        now = time.time()
+        for job_id, finished_at, state in (("old", now - 100, SUCCEEDED), ("new", now, FAILED)):
+            await a.put(_job(job_id))
+            job = await a.claim(lease_timeout=60)
+            assert job.id == job_id
+            job.state, job.finished_at = state, finished_at
+            assert await a.save(job)
+            await a.complete(job)
+        assert await b.claim(lease_timeout=60) is None
+        assert await a.depth() == 0
+
+        expired = await b.expire(now - 10)
+        assert [j.id for j in expired] == ["old"]
+        assert await a.get("old") is None
+        assert (await a.get("new")).state == FAILED
+
+    asyncio.run(main())
+
+
+def test_finished_job_with_expired_lease_is_not_run_again(queues):
+    a, b = queues
+
+    async def main():
+        await a.put(_job("1"))
+        job = await a.claim(lease_timeout=0.05)
+        # The node recorded the outcome and died before completing the lease
+        job.state, job.finished_at = SUCCEEDED, time.time()
+        assert await a.save(job)
+        await asyncio.sleep(0.1)
+
+        async def runner(job):
+            raise AssertionError("must not run again")
+
+        manager = JobManager(runner, b, workers=1, poll_interval=0.02)
+        await manager.start()
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            await manager.stop()
+        assert (await b.get("1")).state == SUCCEEDED
+        assert await b.claim(lease_timeout=60) is None
+
+    asyncio.run(main())
+
+
+def test_redis_record_with_unknown_fields(monkeypatch):
+    a, _ = _redis_queues(monkeypatch)
+
+    async def main():
+        data = asdict(_job("1"))
+        data["retired_field"] = 1
+        del data["preview_slides"]
+        await a._redis.set(a._key("1"), json.dumps(data))
+        job = await a.get("1")
+        assert job.id == "1" and job.preview_slides is None
+        await a.close()
+
+    asyncio.run(main())
@@ -0,0 +1,438 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from jobs import QUEUED, RUNNING, TERMINAL_STATES, Job
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional; only needed for JOB_QUEUE=redis
+    aioredis = None
+
+_JOB_FIELDS = [f.name for f in fields(Job)]
+_JSON_FIELDS = {"options", "deck"}
+
+
+class WorkQueue(ABC):
+    """
+    Shared queue of job records with leases.
+
+    `put` makes a job available. A node with free capacity `claim`s one,
+    which leases it to that node for `lease_timeout` seconds; the node keeps
+    the lease alive with `extend` while it works and ends it with `complete`
+    or, to retry later, `release`. A job whose lease runs out (its node died
+    or stalled) becomes claimable again. `save` persists status changes and
+    only succeeds for the lease holder, so a node that lost its lease cannot
+    overwrite the new holder's progress. Any node can `get` a job's current
+    record.
+    """
+
+    owner: str
+
+    @abstractmethod
+    async def put(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def save(self, job: Job) -> bool:
+        ...
+
+    @abstractmethod
+    async def claim(self, lease_timeout: float) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def extend(self, job_ids: Iterable[str], lease_timeout: float) -> None:
+        ...
+
+    @abstractmethod
+    async def release(self, job: Job, delay: float = 0.0) -> None:
+        ...
+
+    @abstractmethod
+    async def complete(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    async def expire(self, cutoff: float) -> List[Job]:
+        """Forget finished jobs that completed before `cutoff`; returns them for file cleanup."""
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """Jobs waiting to be claimed."""
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def describe(self) -> str:
+        ...
+
+
+class MemoryWorkQueue(WorkQueue):
+    """Single-process backend; jobs are lost on restart."""
+
+    def __init__(self, owner: str = "local"):
+        self.owner = owner
+        # job id -> [job, lease owner, lease expiry, available at]
+        self._records: Dict[str, list] = {}
+
+    async def put(self, job: Job) -> None:
+        self._records[job.id] = [job, None, None, time.time()]
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        record = self._records.get(job_id)
+        return record[0] if record is not None else None
+
+    async def save(self, job: Job) -> bool:
+        record = self._records.get(job.id)
+        if record is None or record[1] != self.owner:
+            return False
+        record[0] = job
+        return True
+
+    async def claim(self, lease_timeout: float) -> Optional[Job]:
+        now = time.time()
+        best: Optional[list] = None
+        for record in self._records.values():
+            job, _, expires, available_at = record
+            if job.state not in (QUEUED, RUNNING) or available_at > now:
+                continue
+            if expires is not None and expires >= now:
+                continue
+            if best is None or available_at < best[3]:
+                best = record
+        if best is None:
+            return None
+        best[1], best[2] = self.owner, now + lease_timeout
+        return best[0]
+
+    async def extend(self, job_ids: Iterable[str], lease_timeout: float) -> None:
+        expires = time.time() + lease_timeout
+        for job_id in job_ids:
+            record = self._records.get(job_id)
+            if record is not None and record[1] == self.owner:
+                record[2] = expires
+
+    async def release(self, job: Job, delay: float = 0.0) -> None:
+        record = self._records.get(job.id)
+        if record is not None and record[1] == self.owner:
+            record[1:] = [None, None, time.time() + delay]
+
+    async def complete(self, job: Job) -> None:
+        record = self._records.get(job.id)
+        if record is not None and record[1] == self.owner:
+            record[1], record[2] = None, None
+
+    async def expire(self, cutoff: float) -> List[Job]:
+        expired = [
+            r[0] for r in self._records.values()
+            if r[0].state in TERMINAL_STATES and r[0].finished_at is not None and r[0].finished_at < cutoff
+        ]
+        for job in expired:
+            del self._records[job.id]
+        return expired
+
+    async def depth(self) -> int:
+        return sum(1 for r in self._records.values() if r[0].state == QUEUED)
+
+    def describe(self) -> str:
+        return "memory"
+
+
+def _row(job: Job) -> List:
+    return [json.dumps(getattr(job, name)) if name in _JSON_FIELDS else getattr(job, name) for name in _JOB_FIELDS]
+
+
+def _job(data) -> Job:
+    values = {name: data[name] for name in _JOB_FIELDS}
+    for name in _JSON_FIELDS:
+        values[name] = json.loads(values[name]) if values[name] else {}
+    return Job(**values)
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Backend in a local SQLite database (WAL mode), shared by all processes on
+    the host and surviving restarts.
+
+    Every Job field is a column next to the lease columns. WAL with
+    synchronous=NORMAL makes each single-row write a cheap append without
+    fsync. Statements still block while another process holds the write lock
+    (up to busy_timeout), so they run one at a time on a dedicated thread and
+    never on the event loop. Do not put the database on a network
+    filesystem; use the Redis backend to share work between hosts.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], owner: str):
+        self.path = Path(path)
+        self.owner = owner
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One thread owns the connection, which also serializes statements
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workqueue-sqlite")
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        columns = ", ".join(name for name in _JOB_FIELDS if name != "id")
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                lease_owner TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL,
+                {columns}
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state_available ON jobs (state, available_at);
+            CREATE INDEX IF NOT EXISTS jobs_state_finished ON jobs (state, finished_at);
+            """
+        )
+        # Databases created by older versions lack columns for newer Job fields
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for name in _JOB_FIELDS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name}")
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _execute(self, sql: str, params: Iterable = ()) -> int:
+        return await self._run(lambda: self._conn.execute(sql, tuple(params)).rowcount)
+
+    async def _fetchone(self, sql: str, params: Iterable = ()) -> Optional[sqlite3.Row]:
+        return await self._run(lambda: self._conn.execute(sql, tuple(params)).fetchone())
+
+    async def put(self, job: Job) -> None:
+        names = ["available_at"] + _JOB_FIELDS
+        await self._execute(
+            f"INSERT INTO jobs ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+            [time.time()] + _row(job),
+        )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        row = await self._fetchone("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _job(row) if row is not None else None
+
+    async def save(self, job: Job) -> bool:
+        updates = ", ".join(f"{name} = ?" for name in _JOB_FIELDS if name != "id")
+        values = _row(job)[1:]
+        return await self._execute(f"UPDATE jobs SET {updates} WHERE id = ? AND lease_owner = ?", values + [job.id, self.owner]) == 1
+
+    def _claim(self, lease_timeout: float) -> Optional[sqlite3.Row]:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE state IN (?, ?) AND available_at <= ? "
+                "AND (lease_expires IS NULL OR lease_expires < ?) ORDER BY available_at LIMIT 1",
+                (QUEUED, RUNNING, now, now),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    (self.owner, now + lease_timeout, row["id"]),
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return row
+
+    async def claim(self, lease_timeout: float) -> Optional[Job]:
+        row = await self._run(self._claim, lease_timeout)
+        return _job(row) if row is not None else None
+
+    async def extend(self, job_ids: Iterable[str], lease_timeout: float) -> None:
+        expires = time.time() + lease_timeout
+        params = [(expires, job_id, self.owner) for job_id in job_ids]
+        await self._run(self._conn.executemany, "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?", params)
+
+    async def release(self, job: Job, delay: float = 0.0) -> None:
+        await self._execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL, available_at = ? WHERE id = ? AND lease_owner = ?",
+            (time.time() + delay, job.id, self.owner),
+        )
+
+    async def complete(self, job: Job) -> None:
+        await self._execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?",
+            (job.id, self.owner),
+        )
+
+    def _expire(self, cutoff: float) -> List[sqlite3.Row]:
+        placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+        rows = self._conn.execute(
+            f"SELECT * FROM jobs WHERE state IN ({placeholders}) AND finished_at < ?",
+            (*TERMINAL_STATES, cutoff),
+        ).fetchall()
+        self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(r["id"],) for r in rows])
+        return rows
+
+    async def expire(self, cutoff: float) -> List[Job]:
+        return [_job(r) for r in await self._run(self._expire, cutoff)]
+
+    async def depth(self) -> int:
+        return (await self._fetchone("SELECT COUNT(*) FROM jobs WHERE state = ?", (QUEUED,)))[0]
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=False)
+
+    def describe(self) -> str:
+        return f"sqlite:{self.path}"
+
+
+# KEYS: ready, leased, owners; ARGV: now, lease_timeout, owner
+_CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[3], id)
+    redis.call('ZADD', KEYS[1], ARGV[1], id)
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then
+    return false
+end
+local id = ids[1]
+redis.call('ZREM', KEYS[1], id)
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), id)
+redis.call('HSET', KEYS[3], id, ARGV[3])
+return id
+"""
+
+# KEYS: owners, record; ARGV: id, owner, record json
+_SAVE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS: owners, leased, target zset; ARGV: id, owner, target score
+_UNLEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: owners, leased; ARGV: owner, expiry, ids...
+_EXTEND_SCRIPT = """
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[1] then
+        redis.call('ZADD', KEYS[2], 'XX', ARGV[2], ARGV[i])
+    end
+end
+return 0
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Backend in Redis, for several hosts sharing one queue.
+
+    Records are JSON strings; a `ready` sorted set orders claimable jobs by
+    availability time and a `leased` sorted set by lease expiry. Claims,
+    renewals and fenced writes are Lua scripts, so they are atomic. Lease
+    times come from the nodes' clocks, which therefore need to be roughly in
+    sync. Upload and result files are not moved by the queue: all nodes need
+    the same uploads, outputs, jobs and cache directories (e.g. a shared
+    volume mounted as DATA_DIR). LibreOffice profiles stay apart per host.
+    """
+
+    def __init__(self, url: str, owner: str, prefix: str = "pptx2pdf"):
+        if aioredis is None:
+            raise RuntimeError("JOB_QUEUE=redis requires the redis package (pip install redis)")
+        self.url = url
+        self.owner = owner
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+        self._ready = f"{prefix}:ready"
+        self._leased = f"{prefix}:leased"
+        self._owners = f"{prefix}:owners"
+        self._finished = f"{prefix}:finished"
+        self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+        self._save = self._redis.register_script(_SAVE_SCRIPT)
+        self._unlease = self._redis.register_script(_UNLEASE_SCRIPT)
+        self._extend = self._redis.register_script(_EXTEND_SCRIPT)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    async def put(self, job: Job) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job.id), json.dumps(asdict(job)))
+            pipe.zadd(self._ready, {job.id: time.time()})
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        data = await self._redis.get(self._key(job_id))
+        if data is None:
+            return None
+        # Records written by other versions may lack or carry extra fields
+        values = json.loads(data)
+        return Job(**{name: values[name] for name in _JOB_FIELDS if name in values})
+
+    async def save(self, job: Job) -> bool:
+        saved = await self._save(keys=[self._owners, self._key(job.id)], args=[job.id, self.owner, json.dumps(asdict(job))])
+        return bool(saved)
+
+    async def claim(self, lease_timeout: float) -> Optional[Job]:
+        job_id = await self._claim(keys=[self._ready, self._leased, self._owners], args=[time.time(), lease_timeout, self.owner])
+        if not job_id:
+            return None
+        return await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+
+    async def extend(self, job_ids: Iterable[str], lease_timeout: float) -> None:
+        job_ids = list(job_ids)
+        if job_ids:
+            await self._extend(keys=[self._owners, self._leased], args=[self.owner, time.time() + lease_timeout, *job_ids])
+
+    async def release(self, job: Job, delay: float = 0.0) -> None:
+        await self._unlease(keys=[self._owners, self._leased, self._ready], args=[job.id, self.owner, time.time() + delay])
+
+    async def complete(self, job: Job) -> None:
+        await self._unlease(
+            keys=[self._owners, self._leased, self._finished],
+            args=[job.id, self.owner, job.finished_at or time.time()],
+        )
+
+    async def expire(self, cutoff: float) -> List[Job]:
+        expired: List[Job] = []
+        for job_id in await self._redis.zrangebyscore(self._finished, "-inf", cutoff):
+            # Only the node that removes the entry cleans up after the job
+            if not await self._redis.zrem(self._finished, job_id):
+                continue
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            job = await self.get(job_id)
+            await self._redis.delete(self._key(job_id))
+            if job is not None:
+                expired.append(job)
+        return expired
+
+    async def depth(self) -> int:
+        return await self._redis.zcard(self._ready)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def describe(self) -> str:
+        return f"redis:{self.prefix}"